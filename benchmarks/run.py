@@ -0,0 +1,312 @@
+"""Benchmark the serialization overhead of drf-confidential.
+
+Seeds an in-memory SQLite database with the models of the test app,
+then times list, detail and nested serialization for a privileged, an
+owner and an unprivileged user. Each confidential serializer is run
+on a plain queryset and on a queryset prepared like
+`ConfidentialQuerysetMixin` does, and compared with a plain
+`ModelSerializer` baseline. Results are written as JSON.
+
+    python -m benchmarks.run --employees 10000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+django.setup()
+
+# pylint: disable=wrong-import-position
+import rest_framework  # noqa: E402
+from django.contrib.auth.models import Permission  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from drf_confidential.queryset import (  # noqa: E402
+    annotate_exposure,
+    defer_confidential,
+)
+from drf_confidential.related import select_exposure_related  # noqa: E402
+from tests.testapp.models import (  # noqa: E402
+    Employee,
+    EmployeeJob,
+    Post,
+    Profile,
+)
+from tests.testapp.serializers import (  # noqa: E402
+    EmployeeJobSerializer,
+    EmployeeSerializer,
+    PostSerializer,
+    ProfileSerializer,
+)
+
+from .serializers import (  # noqa: E402
+    EmployeeBaselineSerializer,
+    EmployeeJobBaselineSerializer,
+    PostBaselineSerializer,
+    ProfileBaselineSerializer,
+)
+
+# model name, confidential serializer, baseline serializer, base queryset
+SCENARIOS = (
+    (
+        "employee",
+        EmployeeSerializer,
+        EmployeeBaselineSerializer,
+        lambda: Employee.objects.order_by("pk"),
+    ),
+    (
+        "employeejob",
+        EmployeeJobSerializer,
+        EmployeeJobBaselineSerializer,
+        lambda: EmployeeJob.objects.order_by("pk"),
+    ),
+    (
+        "post",
+        PostSerializer,
+        PostBaselineSerializer,
+        lambda: Post.objects.order_by("pk"),
+    ),
+    (
+        "profile",
+        ProfileSerializer,
+        ProfileBaselineSerializer,
+        lambda: Profile.objects.filter(employee_profile__isnull=False)
+        .select_related("employee_profile")
+        .prefetch_related("groups", "user_permissions")
+        .order_by("pk"),
+    ),
+)
+
+PERMISSIONS = (
+    "view_sensitive_employee",
+    "view_sensitive_profile",
+    "view_employee_salary",
+    "view_sensitive_post",
+)
+
+
+def seed(num_employees, num_posts, rng):
+    """Fill the database and return the benchmarked users by role."""
+
+    def text(length):
+        return "".join(rng.choice(string.ascii_letters) for _ in range(length))
+
+    Employee.objects.bulk_create(
+        [
+            Employee(
+                first_name=text(5),
+                last_name=text(5),
+                address_1=text(16),
+                address_2=text(16),
+                country=text(8),
+                city=text(8),
+                phone_number=text(12),
+            )
+            for _ in range(num_employees)
+        ],
+        batch_size=500,
+    )
+    employees = list(Employee.objects.order_by("pk"))
+    Profile.objects.bulk_create(
+        [
+            Profile(
+                username="user{}".format(index),
+                email="user{}@domain.com".format(index),
+                password="!",
+                employee_profile=employee,
+            )
+            for index, employee in enumerate(employees)
+        ],
+        batch_size=500,
+    )
+    EmployeeJob.objects.bulk_create(
+        [
+            EmployeeJob(
+                employee=employee,
+                job_title=text(8),
+                salary=rng.randint(10000, 200000),
+            )
+            for employee in employees
+        ],
+        batch_size=500,
+    )
+    profiles = list(Profile.objects.order_by("pk"))
+    Post.objects.bulk_create(
+        [
+            Post(
+                post_title=text(16),
+                post_content=text(256),
+                secret_note=text(16),
+                created_by=rng.choice(profiles),
+            )
+            for _ in range(num_posts)
+        ],
+        batch_size=500,
+    )
+
+    privileged = Profile.objects.create(username="privileged", password="!")
+    privileged.user_permissions.add(
+        *Permission.objects.filter(codename__in=PERMISSIONS)
+    )
+    unprivileged = Profile.objects.create(
+        username="unprivileged", password="!"
+    )
+    return {
+        "privileged": privileged.pk,
+        "owner": profiles[0].pk,
+        "unprivileged": unprivileged.pk,
+    }
+
+
+def make_request(user_pk):
+    """Build a request authenticated as a freshly loaded user."""
+    request = APIRequestFactory().get("/")
+    request.user = Profile.objects.get(pk=user_pk)
+    return request
+
+
+def prepare(queryset, serializer_class, variant, request):
+    """Prepare the queryset the way the variant would in a viewset."""
+    if variant != "optimized":
+        return queryset
+    queryset = select_exposure_related(
+        queryset, serializer_class, include_own=False
+    )
+    queryset = annotate_exposure(queryset, serializer_class, request.user)
+    return defer_confidential(queryset, serializer_class, request.user)
+
+
+def make_runs(args, user_pk, serializer_class, queryset_factory, variant):
+    """Return the list and detail runs and their row counts."""
+    detail_pks = list(
+        queryset_factory().values_list("pk", flat=True)[: args.detail_count]
+    )
+
+    def run_list():
+        request = make_request(user_pk)
+        queryset = prepare(
+            queryset_factory(), serializer_class, variant, request
+        )
+        serializer = serializer_class(
+            queryset[: args.list_size], many=True, context={"request": request}
+        )
+        return serializer.data
+
+    def run_detail():
+        for pk in detail_pks:
+            request = make_request(user_pk)
+            queryset = prepare(
+                queryset_factory(), serializer_class, variant, request
+            )
+            serializer = serializer_class(
+                queryset.get(pk=pk), context={"request": request}
+            )
+            serializer.data  # pylint: disable=pointless-statement
+
+    return (
+        ("list", run_list, min(args.list_size, queryset_factory().count())),
+        ("detail", run_detail, len(detail_pks)),
+    )
+
+
+def measure(run, repeat):
+    """Return the median duration and the query count of the run."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    with CaptureQueriesContext(connection) as context:
+        run()
+    return statistics.median(timings), len(context.captured_queries)
+
+
+def benchmark(args, users):
+    results = []
+    for model_name, confidential, baseline, queryset_factory in SCENARIOS:
+        for role, user_pk in users.items():
+            variants = (
+                ("baseline", baseline),
+                ("confidential", confidential),
+                ("optimized", confidential),
+            )
+            baseline_per_row = {}
+            for variant, serializer_class in variants:
+                runs = make_runs(
+                    args, user_pk, serializer_class, queryset_factory, variant
+                )
+                for kind, run, rows in runs:
+                    seconds, queries = measure(run, args.repeat)
+                    per_row = seconds / rows * 1e6 if rows else 0.0
+                    if variant == "baseline":
+                        baseline_per_row[kind] = per_row
+                    results.append(
+                        {
+                            "kind": kind,
+                            "model": model_name,
+                            "nested": model_name == "profile",
+                            "user": role,
+                            "variant": variant,
+                            "rows": rows,
+                            "seconds": seconds,
+                            "queries": queries,
+                            "us_per_row": per_row,
+                            "overhead_us_per_row": per_row
+                            - baseline_per_row[kind],
+                        }
+                    )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--posts", type=int, default=10000)
+    parser.add_argument("--list-size", type=int, default=1000)
+    parser.add_argument("--detail-count", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    users = seed(args.employees, args.posts, random.Random(args.seed))
+
+    document = {
+        "meta": {
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "djangorestframework": rest_framework.VERSION,
+            "database": connection.vendor,
+            "employees": args.employees,
+            "posts": args.posts,
+            "list_size": args.list_size,
+            "detail_count": args.detail_count,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": benchmark(args, users),
+    }
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(document, output, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+from tests.testapp.models import Employee, Profile, EmployeeJob, Post
+
+
+class EmployeeBaselineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Employee
+        fields = "__all__"
+
+
+class ProfileBaselineSerializer(serializers.ModelSerializer):
+    employee_profile = EmployeeBaselineSerializer()
+
+    class Meta:
+        model = Profile
+        fields = "__all__"
+
+
+class EmployeeJobBaselineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EmployeeJob
+        fields = "__all__"
+
+
+class PostBaselineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Post
+        fields = "__all__"
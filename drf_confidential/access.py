@@ -0,0 +1,239 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.functions import Cast
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+
+from .compat import alist, run_sync
+from .lookups import get_relation_field
+from .models import AccessEntry
+from .signals import bulk_saved, pre_bulk_save
+
+dispatch_uid = "drf_confidential.access"
+
+# The indexed relation paths by (model, lookup), and the positions
+# along these paths of every model whose changes can relink their rows.
+_paths = {}
+_tracked = {}
+
+
+def needs_index(path):
+    """Return whether the path takes more than the row to resolve."""
+    return not path.is_local
+
+
+def _get_entries(user, model, paths):
+    return AccessEntry.objects.filter(
+        user_id=user.pk,
+        content_type=ContentType.objects.get_for_model(model),
+        lookup__in=[path.lookup for path in paths],
+    )
+
+
+def get_linked_lookup(model, paths, pk, user):
+    """Return a lookup of the paths linking the row to the user, if any."""
+    return (
+        _get_entries(user, model, paths)
+        .filter(object_pk=str(pk))
+        .values_list("lookup", flat=True)
+        .first()
+    )
+
+
+async def aget_linked_lookup(model, paths, pk, user):
+    """Async variant of `get_linked_lookup`."""
+    # Filtering the entries may look the content type up.
+    entries = await run_sync(_get_entries)(user, model, paths)
+    lookups = await alist(
+        entries.filter(object_pk=str(pk)).values_list("lookup", flat=True)[:1]
+    )
+    return lookups[0] if lookups else None
+
+
+def get_linked_queryset(model, paths, user):
+    """Return the primary keys of the rows linked to the user.
+
+    A queryset of single values, to be used as a subquery.
+    """
+    return (
+        _get_entries(user, model, paths)
+        .annotate(linked_pk=Cast("object_pk", output_field=model._meta.pk))
+        .values_list("linked_pk", flat=True)
+    )
+
+
+def _build_entries(path, queryset):
+    content_type = ContentType.objects.get_for_model(path.model)
+    rows = queryset.values_list("pk", path.query_path).distinct()
+    return [
+        AccessEntry(
+            user_id=user_pk,
+            content_type=content_type,
+            object_pk=str(pk),
+            lookup=path.lookup,
+        )
+        for pk, user_pk in rows
+        if user_pk is not None
+    ]
+
+
+def refresh(path, pks):
+    """Recompute the entries of the path for the rows."""
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+    with transaction.atomic(using=AccessEntry.objects.db):
+        AccessEntry.objects.filter(
+            content_type=ContentType.objects.get_for_model(path.model),
+            lookup=path.lookup,
+            object_pk__in=[str(pk) for pk in pks],
+        ).delete()
+        AccessEntry.objects.bulk_create(
+            _build_entries(
+                path, path.model._default_manager.filter(pk__in=pks)
+            )
+        )
+
+
+def rebuild(batch_size=1000):
+    """Recompute the entries of every indexed path from scratch."""
+    with transaction.atomic(using=AccessEntry.objects.db):
+        AccessEntry.objects.all().delete()
+        for path in _paths.values():
+            AccessEntry.objects.bulk_create(
+                _build_entries(path, path.model._default_manager.all()),
+                batch_size=batch_size,
+            )
+
+
+def _get_source_pks(path, index, pks):
+    """Return the rows of the path reaching the rows at the index."""
+    if index == 0:
+        return set(pks)
+    lookup = "__".join(hop.query_name for hop in path.hops[:index])
+    return set(
+        path.model._default_manager.filter(
+            **{lookup + "__in": pks}
+        ).values_list("pk", flat=True)
+    )
+
+
+def _get_affected(model, pks):
+    """Return the rows relinked by changes to the rows, by path."""
+    affected = {}
+    pks = [pk for pk in pks if pk is not None]
+    if not pks:
+        return affected
+    for path, index in _tracked.get(model._meta.concrete_model, ()):
+        affected.setdefault(path, set()).update(
+            _get_source_pks(path, index, pks)
+        )
+    return affected
+
+
+def _remember_affected(sender, instance, raw=False, **kwargs):
+    if raw or sender._meta.concrete_model not in _tracked:
+        return
+    instance._confidential_relinked = _get_affected(sender, [instance.pk])
+
+
+def _refresh_affected(sender, instance, raw=False, deleted=False, **kwargs):
+    if raw or sender._meta.concrete_model not in _tracked:
+        return
+    affected = instance.__dict__.pop("_confidential_relinked", {})
+    if not deleted:
+        for path, pks in _get_affected(sender, [instance.pk]).items():
+            affected.setdefault(path, set()).update(pks)
+    for path, pks in affected.items():
+        refresh(path, pks)
+
+
+def _deleted(sender, instance, **kwargs):
+    _refresh_affected(sender, instance, deleted=True)
+
+
+def _remember_bulk_affected(sender, instances, **kwargs):
+    affected = _get_affected(sender, [instance.pk for instance in instances])
+    for instance in instances:
+        instance._confidential_relinked = affected
+
+
+def _bulk_saved(sender, instances, **kwargs):
+    # The rows relinked before the write are shared by its instances.
+    remembered = {}
+    for instance in instances:
+        relinked = instance.__dict__.pop("_confidential_relinked", None)
+        if relinked:
+            remembered[id(relinked)] = relinked
+    affected = _get_affected(sender, [instance.pk for instance in instances])
+    for relinked in remembered.values():
+        for path, pks in relinked.items():
+            affected.setdefault(path, set()).update(pks)
+    for path, pks in affected.items():
+        refresh(path, pks)
+
+
+def _m2m_changed(sender, instance, action, **kwargs):
+    if action.startswith("pre_"):
+        _remember_affected(type(instance), instance)
+    else:
+        _refresh_affected(type(instance), instance)
+
+
+def _connect(model):
+    model = model._meta.concrete_model
+    pre_save.connect(
+        _remember_affected, sender=model, dispatch_uid=dispatch_uid
+    )
+    post_save.connect(
+        _refresh_affected, sender=model, dispatch_uid=dispatch_uid
+    )
+    pre_delete.connect(
+        _remember_affected, sender=model, dispatch_uid=dispatch_uid
+    )
+    post_delete.connect(_deleted, sender=model, dispatch_uid=dispatch_uid)
+    pre_bulk_save.connect(
+        _remember_bulk_affected, sender=model, dispatch_uid=dispatch_uid
+    )
+    bulk_saved.connect(_bulk_saved, sender=model, dispatch_uid=dispatch_uid)
+
+
+def track(policy):
+    """Maintain the entries of the policy's indexed paths.
+
+    Every model along the paths is watched, so that saving or deleting
+    any row on the way, or changing a many-to-many relation, refreshes
+    the entries of the rows it relinks.
+    """
+    for path in policy.indexed:
+        key = (path.model, path.lookup)
+        if key in _paths:
+            continue
+        _paths[key] = path
+
+        model = path.model
+        for index, hop in enumerate(path.hops):
+            _tracked.setdefault(model._meta.concrete_model, []).append(
+                (path, index)
+            )
+            _connect(model)
+            field = get_relation_field(model, hop.accessor)
+            if field.many_to_many:
+                through = (
+                    field.remote_field.through
+                    if field.concrete
+                    else field.through
+                )
+                m2m_changed.connect(
+                    _m2m_changed, sender=through, dispatch_uid=dispatch_uid
+                )
+            model = field.related_model
+        _tracked.setdefault(model._meta.concrete_model, []).append(
+            (path, len(path.hops))
+        )
+        _connect(model)
@@ -0,0 +1,31 @@
+from django.apps import AppConfig
+from django.core import checks
+from django.utils.module_loading import autodiscover_modules
+
+
+class ConfidentialConfig(AppConfig):
+    name = "drf_confidential"
+    verbose_name = "DRF Confidential"
+    default_auto_field = "django.db.models.AutoField"
+
+    def ready(self):
+        from .caching import (
+            check_cache_backend,
+            compile_plans,
+            connect_signals,
+        )
+        from .permissions import check_async_permissions
+        from .policy import compile_policies
+
+        # The access index and the row versions of the cache are
+        # maintained for the serializers and views registered, so
+        # register them in every process that may write rows.
+        autodiscover_modules("serializers", "views")
+
+        # Fail fast on misconfigured serializers instead of on the
+        # first request that uses them.
+        compile_policies()
+        compile_plans()
+        connect_signals()
+        checks.register(check_cache_backend, checks.Tags.caches)
+        checks.register(check_async_permissions, checks.Tags.urls)
@@ -0,0 +1,320 @@
+import hashlib
+import uuid
+from collections import namedtuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from .decisions import decide_exposures, peek_exposure
+from .mixins import ConfidentialFieldsMixin
+from .policy import get_policy
+from .queryset import get_uniform_decision
+from .signals import bulk_saved
+
+cache_alias = getattr(settings, "CONFIDENTIAL_CACHE_ALIAS", "default")
+cache_timeout = getattr(settings, "CONFIDENTIAL_CACHE_TIMEOUT", 300)
+key_prefix = "drf_confidential"
+
+# What a cached serializer's representations depend on.
+#
+# `label` identifies the serializer class in cache keys, `model` is
+# the concrete model of its rows, `nested_policies` the policies of
+# its nested confidential serializers and `nested_models` the
+# concrete models serialized nested in its representations.
+CachePlan = namedtuple(
+    "CachePlan", ("label", "model", "nested_policies", "nested_models")
+)
+
+# Serializer classes defined before the app registry was ready, the
+# compiled plans, and the models whose changes invalidate them.
+_pending_classes = []
+_plans = {}
+_row_models = set()
+_nested_models = set()
+
+
+def _describe_hidden(policy, user, exposed):
+    """Name the fields of the policy hidden from the user, for keys."""
+    if exposed:
+        return "*"
+    return ",".join(sorted(policy.get_hidden_fields(user)))
+
+
+def _walk_nested(serializer):
+    """Yield the serializers nested in the serializer, recursively."""
+    for field in serializer.fields.values():
+        child = field.child if isinstance(field, ListSerializer) else field
+        if isinstance(child, BaseSerializer):
+            yield child
+            yield from _walk_nested(child)
+
+
+def _get_model(serializer_class):
+    model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+    return None if model is None else model._meta.concrete_model
+
+
+def get_plan(serializer_class):
+    """Return the cache plan of the serializer class."""
+    try:
+        return _plans[serializer_class]
+    except KeyError:
+        pass
+
+    nested = list(_walk_nested(serializer_class(context={})))
+    nested_models = {_get_model(type(child)) for child in nested}
+    nested_models.discard(None)
+    plan = CachePlan(
+        label="{}.{}".format(
+            serializer_class.__module__, serializer_class.__qualname__
+        ),
+        model=_get_model(serializer_class),
+        nested_policies=tuple(
+            {
+                get_policy(type(child))
+                for child in nested
+                if isinstance(child, ConfidentialFieldsMixin)
+            }
+        ),
+        nested_models=tuple(
+            sorted(nested_models, key=lambda model: model._meta.label_lower)
+        ),
+    )
+    _row_models.add(plan.model)
+    _nested_models.update(plan.nested_models)
+    _plans[serializer_class] = plan
+    return plan
+
+
+def register(serializer_class):
+    """Register a serializer class using `ConfidentialCacheMixin`."""
+    if _get_model(serializer_class) is None:
+        return  # abstract serializer, nothing to plan
+    if apps.models_ready:
+        get_plan(serializer_class)
+    else:
+        _pending_classes.append(serializer_class)
+
+
+def compile_plans():
+    """Compile the cache plans of the serializer classes pending."""
+    while _pending_classes:
+        get_plan(_pending_classes.pop(0))
+
+
+def _version_key(model, pk):
+    return "{}:version:{}:{}".format(key_prefix, model._meta.label_lower, pk)
+
+
+def _generation_key(model):
+    return "{}:generation:{}".format(key_prefix, model._meta.label_lower)
+
+
+def _get_nested_variant(plan, user):
+    """Name the fields the nested serializers hide from the user.
+
+    Returns `None` when the nested decisions depend on the row.
+    """
+    variant = []
+    for policy in plan.nested_policies:
+        decision = get_uniform_decision(policy, user)
+        if decision is None:
+            return None
+        variant.append(_describe_hidden(policy, user, decision))
+    return variant
+
+
+def _get_versions(cache, keys):
+    """Return the current version token of each key.
+
+    Missing versions are started with a fresh token, so that a lost
+    version never brings stale representations back.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            token = uuid.uuid4().hex
+            if not cache.add(key, token, cache_timeout):
+                # Another process started the version first; keep the
+                # fresh token if it is already gone again.
+                token = cache.get(key) or token
+            versions[key] = token
+    return [versions[key] for key in keys]
+
+
+def invalidate(model, pks=None):
+    """Invalidate the cached representations built from the rows.
+
+    Without primary keys, every representation built from the model
+    is invalidated.
+    """
+    model = model._meta.concrete_model
+    keys = []
+    if pks is None:
+        if model in _row_models or model in _nested_models:
+            keys.append(_generation_key(model))
+    else:
+        if model in _row_models:
+            keys.extend(_version_key(model, pk) for pk in pks)
+        if model in _nested_models:
+            keys.append(_generation_key(model))
+    if keys:
+        caches[cache_alias].set_many(
+            {key: uuid.uuid4().hex for key in keys}, cache_timeout
+        )
+
+
+def _saved_or_deleted(sender, instance, **kwargs):
+    invalidate(sender, [instance.pk])
+
+
+def _bulk_saved(sender, instances, **kwargs):
+    invalidate(sender, [instance.pk for instance in instances])
+
+
+def _m2m_changed(
+    sender, instance, action, model, pk_set, **kwargs
+):  # pylint: disable=unused-argument
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate(type(instance), [instance.pk])
+        invalidate(model, pk_set)
+
+
+def get_etag(serializer_class, request, instances, extra=()):
+    """Return an ETag of the instances as serialized for the user.
+
+    The tag covers the versions of the rows and of the models nested
+    in their representations, and which fields are hidden from the
+    user in each of them, so that a changed row or another exposure
+    changes the tag. Exposure is decided for all instances at once,
+    without serializing them. Returns `None` when the nested
+    decisions depend on the row, or for unsaved instances.
+    """
+    plan = get_plan(serializer_class)
+    user = getattr(request, "user", None)
+    variant = _get_nested_variant(plan, user)
+    if variant is None or any(instance.pk is None for instance in instances):
+        return None
+
+    policy = get_policy(serializer_class)
+    decide_exposures(policy, request, instances)
+    parts = [plan.label] + [str(part) for part in extra] + variant
+    for instance in instances:
+        exposed = peek_exposure(policy, request, instance)
+        parts += [str(instance.pk), _describe_hidden(policy, user, exposed)]
+    parts += _get_versions(
+        caches[cache_alias],
+        [_version_key(plan.model, instance.pk) for instance in instances]
+        + [
+            _generation_key(model)
+            for model in (plan.model,) + plan.nested_models
+        ],
+    )
+    return '"{}"'.format(hashlib.md5(":".join(parts).encode()).hexdigest())
+
+
+def check_cache_backend(**kwargs):
+    """Warn when the versions of the rows are kept per process.
+
+    A write in one process bumps the versions in its own cache only,
+    so other processes would keep serving, and tagging, stale rows.
+    """
+    if not _plans:
+        return []
+    backend = settings.CACHES.get(cache_alias, {}).get("BACKEND", "")
+    if not backend.endswith(".LocMemCache"):
+        return []
+    return [
+        checks.Warning(
+            "The `{}` cache is local to every process.".format(cache_alias),
+            hint=(
+                "Point CONFIDENTIAL_CACHE_ALIAS to a cache shared by "
+                "every process, so that writes invalidate cached "
+                "representations and ETags everywhere."
+            ),
+            id="drf_confidential.W001",
+        )
+    ]
+
+
+def connect_signals():
+    """Invalidate cached representations when their rows change."""
+    post_save.connect(_saved_or_deleted, dispatch_uid=key_prefix)
+    post_delete.connect(_saved_or_deleted, dispatch_uid=key_prefix)
+    m2m_changed.connect(_m2m_changed, dispatch_uid=key_prefix)
+    bulk_saved.connect(_bulk_saved, dispatch_uid=key_prefix)
+
+
+class ConfidentialCacheMixin(ConfidentialFieldsMixin):
+    """Cache the representations of the serializer's instances.
+
+    An instance is represented in full, or without the confidential
+    fields hidden from the user, so every variant is cached, keyed by
+    the serializer, the primary key and the row's version. Saving or
+    deleting the row, or any row of a model serialized nested in it,
+    invalidates them. Only the exposure decision is left to run per
+    user.
+
+    Nested confidential serializers must decide alike for every row,
+    e.g. for privileged or anonymous users; otherwise the instance is
+    serialized without the cache.
+    """
+
+    # The nested exposures and the generations of the nested models,
+    # read once per serializer instance.
+    _cache_state = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register(cls)
+
+    def _get_cache_state(self, plan, cache):
+        if self._cache_state is None:
+            user = getattr(self.context.get("request"), "user", None)
+            variant = _get_nested_variant(plan, user)
+            generations = _get_versions(
+                cache,
+                [
+                    _generation_key(model)
+                    for model in (plan.model,) + plan.nested_models
+                ],
+            )
+            self._cache_state = (variant, generations)
+        return self._cache_state
+
+    def _get_cache_key(self, instance, cache):
+        if instance.pk is None:
+            return None
+        plan = get_plan(type(self))
+        variant, generations = self._get_cache_state(plan, cache)
+        if variant is None:
+            return None
+
+        user = getattr(self.context.get("request"), "user", None)
+        hidden = _describe_hidden(
+            get_policy(type(self)), user, self._check_exposure(instance)
+        )
+        (version,) = _get_versions(
+            cache, [_version_key(plan.model, instance.pk)]
+        )
+        parts = [plan.label, str(instance.pk), version, hidden]
+        digest = hashlib.md5(
+            ":".join(parts + variant + generations).encode()
+        ).hexdigest()
+        return "{}:representation:{}".format(key_prefix, digest)
+
+    def to_representation(self, instance):
+        cache = caches[cache_alias]
+        key = self._get_cache_key(instance, cache)
+        if key is None:
+            return super().to_representation(instance)
+        data = cache.get(key)
+        if data is None:
+            data = super().to_representation(instance)
+            cache.set(key, data, cache_timeout)
+        return data
@@ -0,0 +1,45 @@
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    from asgiref.sync import sync_to_async
+except ImportError:  # Django < 3.0 does not depend on asgiref
+    sync_to_async = None
+
+
+def run_sync(func):
+    """Wrap a synchronous callable to be awaited from async code."""
+    if sync_to_async is None:
+        raise ImproperlyConfigured(
+            "Async exposure checks require asgiref to be installed."
+        )
+    return sync_to_async(func)
+
+
+async def aexists(queryset):
+    """Await `queryset.exists()`, natively if the ORM is async."""
+    if hasattr(queryset, "aexists"):
+        return await queryset.aexists()
+    return await run_sync(queryset.exists)()
+
+
+async def alist(queryset):
+    """Await the evaluation of the queryset into a list."""
+    if hasattr(queryset, "__aiter__"):
+        return [obj async for obj in queryset]
+    return await run_sync(list)(queryset)
+
+
+async def aget_all_permissions(user):
+    """Await `user.get_all_permissions()`, natively if supported."""
+    if hasattr(user, "aget_all_permissions"):
+        return await user.aget_all_permissions()
+    return await run_sync(user.get_all_permissions)()
+
+
+def can_return_bulk_pks(connection):
+    """Return whether `bulk_create` sets the primary keys it inserted."""
+    features = connection.features
+    if hasattr(features, "can_return_rows_from_bulk_insert"):
+        return features.can_return_rows_from_bulk_insert
+    # Django < 3.0
+    return features.can_return_ids_from_bulk_insert
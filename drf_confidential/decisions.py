@@ -0,0 +1,305 @@
+from time import perf_counter
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from . import reasons
+from .compat import alist, run_sync
+from .signals import exposure_checked
+
+# Name of the queryset annotation holding the per-row exposure flag.
+exposure_annotation = "_confidential_exposed"
+
+
+class _QueryCounter:
+    """Database execute wrapper counting the queries run."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def get_http_request(request):
+    """Return the `HttpRequest` underlying a DRF `Request`."""
+    return getattr(request, "_request", request)
+
+
+def _get_memo(request):
+    """Return the exposure decisions memoized on the request.
+
+    The memo lives on the underlying `HttpRequest`, so that it is
+    shared by every DRF `Request` wrapping it.
+    """
+    http_request = get_http_request(request)
+    try:
+        return http_request._confidential_decisions
+    except AttributeError:
+        memo = http_request._confidential_decisions = {}
+        return memo
+
+
+def get_fast_decision(user):
+    """Return the exposure decision that holds for any instance.
+
+    Anonymous users never see confidential fields and active
+    superusers always do. Returns `None` when the decision depends on
+    the instance.
+    """
+    if user is None or not user.is_authenticated:
+        return False
+    if user.is_active and getattr(user, "is_superuser", False):
+        return True
+    return None
+
+
+def is_memoized(request, policy, instance):
+    """Return whether the instance's exposure is memoized."""
+    key = (policy, instance._meta.model, instance.pk)
+    return key in _get_memo(request)
+
+
+def remember_exposure(request, policy, model, decisions):
+    """Memoize a mapping of primary keys to exposure decisions."""
+    memo = _get_memo(request)
+    for pk, exposed in decisions.items():
+        memo[(policy, model, pk)] = exposed
+
+
+def forget_exposure(request, instance):
+    """Drop the memoized decisions of an instance, e.g. once saved."""
+    if request is None:
+        return
+    memo = _get_memo(request)
+    model = instance._meta.model
+    for key in [key for key in memo if key[1:] == (model, instance.pk)]:
+        del memo[key]
+
+
+def clear_exposure(request):
+    """Drop every decision memoized on the request."""
+    if request is not None:
+        _get_memo(request).clear()
+
+
+def _recall(policy, request, instance):
+    """Return the decision if it is known without asking the policy."""
+    exposed = getattr(instance, exposure_annotation, None)
+    if exposed is not None:
+        return exposed, reasons.ANNOTATION
+
+    decision = get_fast_decision(getattr(request, "user", None))
+    if decision is not None:
+        return decision, reasons.SUPERUSER if decision else reasons.ANONYMOUS
+    if instance.pk is None:
+        return None
+
+    key = (policy, instance._meta.model, instance.pk)
+    exposed = _get_memo(request).get(key)
+    if exposed is not None:
+        return exposed, reasons.MEMO
+    return None
+
+
+def _remember(policy, request, instance, reason):
+    """Memoize the policy's explanation and return the decision."""
+    exposed = reason is not None
+    if instance.pk is not None:
+        key = (policy, instance._meta.model, instance.pk)
+        _get_memo(request)[key] = exposed
+    return exposed, reason or reasons.DENIED
+
+
+def _decide(policy, request, instance):
+    """Return the exposure decision and the reason it was reached."""
+    decision = _recall(policy, request, instance)
+    if decision is not None:
+        return decision
+    reason = policy.explain(instance, request.user)
+    return _remember(policy, request, instance, reason)
+
+
+async def _adecide(policy, request, instance):
+    decision = _recall(policy, request, instance)
+    if decision is not None:
+        return decision
+    reason = await policy.aexplain(instance, request.user)
+    return _remember(policy, request, instance, reason)
+
+
+def _send_checked(policy, request, instance, decision, queries, duration):
+    exposed, reason = decision
+    exposure_checked.send(
+        sender=policy.serializer_class,
+        policy=policy,
+        request=request,
+        instance=instance,
+        exposed=exposed,
+        reason=reason,
+        queries=queries,
+        duration=duration,
+    )
+
+
+def report_exposure(policy, request, instance, exposed, reason):
+    """Report a decision taken without a check, e.g. from a parent."""
+    if exposure_checked.receivers:
+        _send_checked(policy, request, instance, (exposed, reason), 0, 0.0)
+
+
+def check_exposure(policy, request, instance):
+    """Decide whether the instance is exposed to the request user.
+
+    Instances annotated with `annotate_exposure` carry their decision.
+    Other decisions are memoized per request and keyed by (policy,
+    model, pk), so that the permission class, the serializer and
+    nested or repeated serializations of the same object decide only
+    once. Receivers of `exposure_checked` are told how every decision
+    was reached and what it cost.
+    """
+    if not exposure_checked.receivers:
+        return _decide(policy, request, instance)[0]
+
+    counter = _QueryCounter()
+    connection = connections[instance._state.db or DEFAULT_DB_ALIAS]
+    start = perf_counter()
+    with connection.execute_wrapper(counter):
+        decision = _decide(policy, request, instance)
+    duration = perf_counter() - start
+    _send_checked(policy, request, instance, decision, counter.count, duration)
+    return decision[0]
+
+
+def peek_exposure(policy, request, instance):
+    """Decide like `check_exposure`, without reporting the decision.
+
+    For decisions taken ahead of the serialization, e.g. to tag a
+    response, which the serialization reports itself.
+    """
+    return _decide(policy, request, instance)[0]
+
+
+async def acheck_exposure(policy, request, instance):
+    """Async variant of `check_exposure`.
+
+    The permission and relation lookups are awaited, using the async
+    ORM when Django provides it. Queries run in other threads cannot
+    be counted, so `exposure_checked` reports `queries=None`.
+    """
+    if not exposure_checked.receivers:
+        return (await _adecide(policy, request, instance))[0]
+
+    start = perf_counter()
+    decision = await _adecide(policy, request, instance)
+    duration = perf_counter() - start
+    _send_checked(policy, request, instance, decision, None, duration)
+    return decision[0]
+
+
+def _get_undecided_pks(policy, request, instances):
+    return [
+        obj.pk
+        for obj in instances
+        if obj.pk is not None
+        and not hasattr(obj, exposure_annotation)
+        and not is_memoized(request, policy, obj)
+    ]
+
+
+def _get_local_exposed(policy, user, instances, pks):
+    """Return the exposed primary keys, if the rows alone tell them.
+
+    Returns `None` when a relation or an object grant must be looked
+    up in the database.
+    """
+    if not policy.is_local or policy.get_grant_q(user) is not None:
+        return None
+    pks = set(pks)
+    return {
+        obj.pk
+        for obj in instances
+        if obj.pk in pks and policy.get_link(obj, user) is not None
+    }
+
+
+def _get_exposed_queryset(policy, user, pks):
+    q = policy.get_access_q(user)
+    if q is None:
+        return None
+    return policy.model._default_manager.filter(q, pk__in=pks).values_list(
+        "pk", flat=True
+    )
+
+
+def _get_exposed(policy, user, instances, pks):
+    """Return the exposed primary keys, or a queryset to evaluate them.
+
+    Building the queryset may look content types up, which is why the
+    async variant runs it outside the event loop.
+    """
+    exposed = _get_local_exposed(policy, user, instances, pks)
+    if exposed is not None:
+        return exposed, None
+    return None, _get_exposed_queryset(policy, user, pks)
+
+
+def decide_exposures(policy, request, instances):
+    """Decide the exposure of the instances in a single query.
+
+    The decisions are memoized on the request, where `check_exposure`
+    picks them up. Instances annotated with their exposure, or
+    already decided, are skipped, and no query is run when the
+    policy's paths are all read from the rows themselves.
+    """
+    user = getattr(request, "user", None)
+    if get_fast_decision(user) is not None:
+        return
+    pks = _get_undecided_pks(policy, request, instances)
+    if not pks:
+        return
+
+    if policy.has_permission(user):
+        exposed = set(pks)
+    else:
+        exposed, queryset = _get_exposed(policy, user, instances, pks)
+        if exposed is None:
+            exposed = set() if queryset is None else set(queryset)
+    remember_exposure(
+        request, policy, policy.model, {pk: pk in exposed for pk in pks}
+    )
+
+
+async def adecide_exposures(policy, request, instances):
+    """Async variant of `decide_exposures`."""
+    user = getattr(request, "user", None)
+    if get_fast_decision(user) is not None:
+        return
+    pks = _get_undecided_pks(policy, request, instances)
+    if not pks:
+        return
+
+    if await policy.ahas_permission(user):
+        exposed = set(pks)
+    else:
+        exposed, queryset = await run_sync(_get_exposed)(
+            policy, user, instances, pks
+        )
+        if exposed is None:
+            exposed = set() if queryset is None else set(await alist(queryset))
+    remember_exposure(
+        request, policy, policy.model, {pk: pk in exposed for pk in pks}
+    )
+
+
+async def acheck_exposures(policy, request, instances):
+    """Decide the exposure of many instances at once, asynchronously.
+
+    Returns the decisions in the order of the instances. Saved
+    instances are decided together in a single awaited query.
+    """
+    await adecide_exposures(policy, request, instances)
+    return [
+        await acheck_exposure(policy, request, instance)
+        for instance in instances
+    ]
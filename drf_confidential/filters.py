@@ -0,0 +1,38 @@
+from rest_framework.filters import BaseFilterBackend
+
+from .queryset import filter_exposure
+
+
+class ConfidentialFilterBackend(BaseFilterBackend):
+    """Filter rows on whether their confidential fields are exposed.
+
+    `?confidential=exposed` keeps the rows whose confidential fields
+    the request user can see, and `?confidential=hidden` the others.
+    The filtering is done in SQL, so pagination counts stay correct.
+    """
+
+    confidential_param = "confidential"
+    choices = {"exposed": True, "hidden": False}
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.confidential_param)
+        if value not in self.choices:
+            return queryset
+        return filter_exposure(
+            queryset,
+            view.get_serializer_class(),
+            getattr(request, "user", None),
+            exposed=self.choices[value],
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.confidential_param,
+                "required": False,
+                "in": "query",
+                "description": "Filter on whether confidential fields "
+                "are exposed.",
+                "schema": {"type": "string", "enum": list(self.choices)},
+            }
+        ]
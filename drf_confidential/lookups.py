@@ -0,0 +1,218 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+
+from .compat import aexists, run_sync
+from .resolution import get_relation_cache
+
+# A single step of a relation path.
+#
+# `accessor` is the attribute holding the related object(s) on the
+# instance, `query_name` the name of the relation in queries,
+# `attname` the attribute holding the related object's primary key
+# when it is stored on the instance itself (forward foreign keys),
+# and `remainder` the query path from the related objects to the end
+# of the path, used to finish a multi-valued hop in a single query.
+Hop = namedtuple(
+    "Hop", ("accessor", "query_name", "attname", "multiple", "remainder")
+)
+
+
+def get_relation_field(model, name):
+    """Return the relation field of the model with the given accessor."""
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        if field.auto_created and not field.concrete:
+            accessor = field.get_accessor_name()
+        else:
+            accessor = field.name
+        if accessor == name:
+            return field
+    raise ImproperlyConfigured(
+        "'{}' is not a relation of {}.".format(name, model._meta.label)
+    )
+
+
+class RelationPath:
+    """A `__` separated relation lookup compiled against a model.
+
+    Every hop of the path is resolved from the model's `_meta` once,
+    so that following the path on an instance costs at most one
+    attribute access per hop. A path ending in a forward foreign key
+    is resolved from the `*_id` attribute without loading the related
+    object, and multi-valued hops are finished in a single query
+    unless their objects were prefetched.
+    """
+
+    __slots__ = ("model", "lookup", "query_path", "hops", "target")
+
+    def __init__(self, model, lookup):
+        names = lookup.split("__")
+        fields = []
+        current = model
+        for name in names:
+            field = get_relation_field(current, name)
+            fields.append(field)
+            current = field.related_model
+
+        query_names = [field.name for field in fields]
+        hops = []
+        for index, field in enumerate(fields):
+            attname = None
+            if field.concrete and not field.many_to_many:
+                if field.target_field.primary_key:
+                    attname = field.attname
+            hops.append(
+                Hop(
+                    accessor=names[index],
+                    query_name=field.name,
+                    attname=attname,
+                    multiple=field.one_to_many or field.many_to_many,
+                    remainder="__".join(query_names[index + 1 :]) or "pk",
+                )
+            )
+
+        self.model = model
+        self.lookup = lookup
+        self.query_path = "__".join(query_names)
+        self.hops = tuple(hops)
+        self.target = current
+
+    def __repr__(self):
+        return "<RelationPath {}: {}>".format(
+            self.model._meta.label, self.lookup
+        )
+
+    @property
+    def ends_at_user(self):
+        """Whether the path resolves to instances of the user model."""
+        return (
+            self.target._meta.concrete_model
+            is get_user_model()._meta.concrete_model
+        )
+
+    def _resolve(self, obj, index):
+        hop = self.hops[index]
+        is_last = index == len(self.hops) - 1
+
+        if hop.multiple:
+            manager = getattr(obj, hop.accessor)
+            prefetched = getattr(obj, "_prefetched_objects_cache", {})
+            if hop.accessor not in prefetched:
+                ids = manager.values_list(hop.remainder, flat=True)
+                return {pk for pk in ids if pk is not None}
+            ids = set()
+            for related in manager.all():
+                if is_last:
+                    ids.add(related.pk)
+                else:
+                    ids.update(self._resolve(related, index + 1))
+            return ids
+
+        if is_last and hop.attname is not None:
+            value = getattr(obj, hop.attname)
+            return set() if value is None else {value}
+
+        # Misses on reverse one-to-one relations are cached on the
+        # instance by Django, so they are not queried again either.
+        try:
+            related = getattr(obj, hop.accessor)
+        except ObjectDoesNotExist:
+            return set()
+        if related is None:
+            return set()
+        if is_last:
+            return {related.pk}
+        return self._resolve(related, index + 1)
+
+    @property
+    def is_local(self):
+        """Whether the path resolves from the instance's own columns."""
+        return len(self.hops) == 1 and self.hops[0].attname is not None
+
+    def _get_cache(self, instance):
+        if self.is_local or instance.pk is None:
+            return None
+        return get_relation_cache()
+
+    def resolve(self, instance):
+        """Return the primary keys the path resolves to on the instance.
+
+        Saved instances are resolved through the relation cache, when
+        enabled, unless the path is local.
+        """
+        cache = self._get_cache(instance)
+        if cache is None:
+            return self._resolve(instance, 0)
+        user_ids = cache.get(self, instance.pk)
+        if user_ids is None:
+            user_ids = self._resolve(instance, 0)
+            cache.set(self, instance.pk, user_ids)
+        return user_ids
+
+    def is_linked(self, instance, user):
+        """Return whether the path resolves to the user."""
+        return user.pk is not None and user.pk in self.resolve(instance)
+
+    async def ais_linked(self, instance, user):
+        """Async variant of `is_linked`.
+
+        Rather than following the path hop by hop, the path of a saved
+        instance is finished in a single awaited query.
+        """
+        if user.pk is None:
+            return False
+        if self.is_local:
+            return getattr(instance, self.hops[0].attname) == user.pk
+        if instance.pk is None:
+            return await run_sync(self.is_linked)(instance, user)
+        cache = get_relation_cache()
+        if cache is not None:
+            user_ids = cache.get(self, instance.pk)
+            if user_ids is not None:
+                return user.pk in user_ids
+        return await aexists(
+            self.model._default_manager.filter(
+                pk=instance.pk, **{self.query_path: user.pk}
+            )
+        )
+
+
+@lru_cache(maxsize=None)
+def compile_lookup(model, lookup):
+    """Return the compiled relation path of the lookup on the model."""
+    return RelationPath(model, lookup)
+
+
+@lru_cache(maxsize=None)
+def compile_user_lookup(model, lookup):
+    """Return the compiled path of a lookup leading to the user model.
+
+    Paths are compared with the user's primary key, so a lookup ending
+    at any other model is rejected.
+    """
+    path = compile_lookup(model, lookup)
+    if not path.ends_at_user:
+        raise ImproperlyConfigured(
+            "'{}' of {} leads to {}, not to the user model.".format(
+                lookup, model._meta.label, path.target._meta.label
+            )
+        )
+    return path
+
+
+@lru_cache(maxsize=None)
+def get_ownership_path(model, ownership_field):
+    """Return the compiled ownership path of the model.
+
+    Returns `None` if the model has no relation named after the
+    ownership field, or if that relation does not lead to the user
+    model.
+    """
+    try:
+        return compile_user_lookup(model, ownership_field)
+    except ImproperlyConfigured:
+        return None
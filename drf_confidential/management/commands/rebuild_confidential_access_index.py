@@ -0,0 +1,34 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from drf_confidential import policy
+from drf_confidential.access import rebuild
+from drf_confidential.models import AccessEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the access index of the confidential relation lookups, "
+        "e.g. after writes that sent no model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of entries inserted per query.",
+        )
+
+    def handle(self, *args, **options):
+        if not policy.use_access_index:
+            raise CommandError("CONFIDENTIAL_ACCESS_INDEX is not enabled.")
+        # Serializers register their lookups when imported, which the
+        # URLconf does through the views.
+        import_module(settings.ROOT_URLCONF)
+        rebuild(batch_size=options["batch_size"])
+        self.stdout.write(
+            "Indexed {} entries.".format(AccessEntry.objects.count())
+        )
@@ -0,0 +1,204 @@
+from collections import Counter
+from threading import Lock
+
+from django.http import HttpResponse
+
+from .decisions import get_http_request
+from .signals import exposure_checked, permission_checked
+
+# Upper bounds of the histogram of exposure checks per request.
+request_check_buckets = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class ConfidentialMetrics:
+    """In-process counters and timers of the confidential checks.
+
+    Fed by the instrumentation signals once `connect_metrics` ran, and
+    rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.exposure_checks = Counter()
+            self.exposure_queries = 0
+            self.exposure_seconds = 0.0
+            self.permission_checks = Counter()
+            self.permission_seconds = 0.0
+            self.request_buckets = [0] * len(request_check_buckets)
+            self.request_checks = 0
+            self.requests = 0
+
+    def record_exposure(self, reason, exposed, queries, duration):
+        with self._lock:
+            self.exposure_checks[(reason, exposed)] += 1
+            self.exposure_queries += queries or 0
+            self.exposure_seconds += duration
+
+    def record_permission(self, method, granted, duration):
+        with self._lock:
+            self.permission_checks[(method, granted)] += 1
+            self.permission_seconds += duration
+
+    def record_request(self, checks):
+        with self._lock:
+            for index, bound in enumerate(request_check_buckets):
+                if checks <= bound:
+                    self.request_buckets[index] += 1
+            self.request_checks += checks
+            self.requests += 1
+
+    def render(self):
+        """Return the metrics in the Prometheus text format."""
+        with self._lock:
+            lines = []
+
+            def metric(name, kind, help_text, samples):
+                lines.append("# HELP {} {}".format(name, help_text))
+                lines.append("# TYPE {} {}".format(name, kind))
+                for suffix, labels, value in samples:
+                    labels = ",".join(
+                        '{}="{}"'.format(*label) for label in labels
+                    )
+                    lines.append(
+                        "{}{}{} {}".format(
+                            name,
+                            suffix,
+                            "{" + labels + "}" if labels else "",
+                            value,
+                        )
+                    )
+
+            metric(
+                "drf_confidential_exposure_checks_total",
+                "counter",
+                "Exposure checks by how the decision was reached.",
+                [
+                    (
+                        "",
+                        (("reason", reason), ("exposed", _bool(exposed))),
+                        count,
+                    )
+                    for (reason, exposed), count in sorted(
+                        self.exposure_checks.items()
+                    )
+                ],
+            )
+            metric(
+                "drf_confidential_exposure_check_queries_total",
+                "counter",
+                "Queries run while deciding exposure.",
+                [("", (), self.exposure_queries)],
+            )
+            metric(
+                "drf_confidential_exposure_check_seconds_total",
+                "counter",
+                "Time spent deciding exposure.",
+                [("", (), self.exposure_seconds)],
+            )
+            metric(
+                "drf_confidential_permission_checks_total",
+                "counter",
+                "Checks of ConfidentialFieldsPermission by outcome.",
+                [
+                    (
+                        "",
+                        (("method", method), ("granted", _bool(granted))),
+                        count,
+                    )
+                    for (method, granted), count in sorted(
+                        self.permission_checks.items()
+                    )
+                ],
+            )
+            metric(
+                "drf_confidential_permission_check_seconds_total",
+                "counter",
+                "Time spent in ConfidentialFieldsPermission.",
+                [("", (), self.permission_seconds)],
+            )
+            metric(
+                "drf_confidential_request_exposure_checks",
+                "histogram",
+                "Exposure checks per request.",
+                [
+                    ("_bucket", (("le", bound),), count)
+                    for bound, count in zip(
+                        request_check_buckets, self.request_buckets
+                    )
+                ]
+                + [
+                    ("_bucket", (("le", "+Inf"),), self.requests),
+                    ("_sum", (), self.request_checks),
+                    ("_count", (), self.requests),
+                ],
+            )
+            return "\n".join(lines) + "\n"
+
+
+def _bool(value):
+    return "true" if value else "false"
+
+
+metrics = ConfidentialMetrics()
+
+
+def _count_request_check(request):
+    if request is None:
+        return
+    http_request = get_http_request(request)
+    http_request._confidential_checks = (
+        getattr(http_request, "_confidential_checks", 0) + 1
+    )
+
+
+def _exposure_checked(
+    request, exposed, reason, queries, duration, **kwargs
+):  # pylint: disable=unused-argument
+    metrics.record_exposure(reason, exposed, queries, duration)
+    _count_request_check(request)
+
+
+def _permission_checked(
+    method, granted, duration, **kwargs
+):  # pylint: disable=unused-argument
+    metrics.record_permission(method, granted, duration)
+
+
+def connect_metrics():
+    """Feed the in-process metrics from the instrumentation signals."""
+    exposure_checked.connect(
+        _exposure_checked, dispatch_uid="drf_confidential.metrics"
+    )
+    permission_checked.connect(
+        _permission_checked, dispatch_uid="drf_confidential.metrics"
+    )
+
+
+def disconnect_metrics():
+    """Stop feeding the in-process metrics."""
+    exposure_checked.disconnect(dispatch_uid="drf_confidential.metrics")
+    permission_checked.disconnect(dispatch_uid="drf_confidential.metrics")
+
+
+class ConfidentialMetricsMiddleware:
+    """Collect the metrics and count exposure checks per request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connect_metrics()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        metrics.record_request(getattr(request, "_confidential_checks", 0))
+        return response
+
+
+def metrics_view(request):  # pylint: disable=unused-argument
+    """Expose the metrics in the Prometheus text format."""
+    return HttpResponse(
+        metrics.render(), content_type="text/plain; version=0.0.4"
+    )
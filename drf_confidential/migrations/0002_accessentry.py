@@ -0,0 +1,35 @@
+# Generated by Django 2.2.28 on 2026-10-18 09:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('drf_confidential', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_pk', models.CharField(max_length=255)),
+                ('lookup', models.CharField(max_length=255)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='confidential_access', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='accessentry',
+            index=models.Index(fields=['content_type', 'lookup', 'object_pk'], name='drf_confide_content_dbe527_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='accessentry',
+            unique_together={('user', 'content_type', 'object_pk', 'lookup')},
+        ),
+    ]
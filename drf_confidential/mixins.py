@@ -1,65 +1,63 @@
-from django.conf import settings
-
-permission_template = getattr(
-    settings,
-    "CONFIDENTIAL_PERMISSION_TEMPLATE",
-    "view_sensitive_{model_name}",
-)
-ownership_field = getattr(
-    settings, "CONFIDENTIAL_OWNERSHIP_FIELD", "created_by"
-)
+from .decisions import check_exposure, forget_exposure
+from .nesting import decide_from_parent, hand_down_exposure
+from .policy import get_policy, register
+from .serializers import ConfidentialListSerializer
 
 
 class ConfidentialFieldsMixin:
-    @staticmethod
-    def _resolve_lookups(instance, lookups):
-        """Traverse across the instance's relationship.
+    # Names of the fields withheld from the instance being serialized.
+    _hidden_fields = ()
+    # The parent's instance and decision, handed down when nested.
+    _parent_exposure = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        register(cls)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        """Default to the confidential list serializer for `many=True`.
 
-        Recursively resolve the relationship fields in the lookups list
-        and return the final model instance when traversals have
-        exhausted.
+        An explicit `list_serializer_class` on the meta is respected,
+        and the meta is left as declared.
         """
-        field = lookups.pop(0)
-        if hasattr(instance, field):
-            new_instance = getattr(instance, field)
-        else:
-            return None
-        if len(lookups) > 0:
-            return ConfidentialFieldsMixin._resolve_lookups(
-                new_instance, lookups
-            )
-        return new_instance
+        list_serializer = super().many_init(*args, **kwargs)
+        meta = getattr(cls, "Meta", None)
+        if not hasattr(meta, "list_serializer_class"):
+            # Only adds methods, so the built list can be switched over.
+            list_serializer.__class__ = ConfidentialListSerializer
+        return list_serializer
 
     def _check_exposure(self, instance):
         """Run check against the request user to determine exposure.
 
         Evaluates user's permission to view the model instance's
-        confidential fields, or ownership, or self.
+        confidential fields, or ownership, or self. If the instance
+        was fetched with `annotate_exposure`, the annotated flag is
+        used instead. Nested serializers declared in the parent's
+        `confidential_nested` decide from the parent's decision or
+        instance. Otherwise, the decision is memoized on the request.
         """
-        app_label = instance._meta.app_label
-        model_name = instance._meta.model_name
-        confidential_permission = (
-            app_label
-            + "."
-            + getattr(
-                self.Meta, "confidential_permission", permission_template
-            ).format(model_name=model_name)
+        exposed = decide_from_parent(self, instance)
+        if exposed is not None:
+            return exposed
+        return check_exposure(
+            get_policy(type(self)), self.context.get("request"), instance
         )
-        user_link = getattr(self.Meta, "user_relation", None)
 
-        user = getattr(self.context.get("request"), "user", None)
+    def save(self, **kwargs):
+        """Forget memoized decisions of the instance once written."""
+        instance = super().save(**kwargs)
+        forget_exposure(self.context.get("request"), instance)
+        return instance
 
-        if user is not None:
-            if user.has_perm(confidential_permission):
-                return True
-            if instance == user:
-                return True
-            if getattr(instance, ownership_field, None) == user:
-                return True
-            if user_link:
-                field_lookups = user_link.split("__")
-                return self._resolve_lookups(instance, field_lookups) == user
-        return False
+    @property
+    def _readable_fields(self):
+        """Readable fields, minus the ones withheld for the instance."""
+        hidden_fields = self._hidden_fields
+        for field in super()._readable_fields:
+            if field.field_name not in hidden_fields:
+                yield field
 
     def to_representation(self, instance):
         """Override deserialization method.
@@ -67,16 +65,16 @@ class ConfidentialFieldsMixin:
         The resulting data depends on the user's permission on the
         model instance. If the user does not have the permission, then
         the confidential fields are withheld. Otherwise, they will be
-        shown.
+        shown. Exposure is decided first, so that withheld fields are
+        never evaluated.
         """
-        ret = super().to_representation(instance)
-        expose = self._check_exposure(instance)
-
-        if not expose:
-            for field in getattr(self.Meta, "confidential_fields"):
-                try:
-                    del ret[field]
-                except KeyError:  # pragma: no cover
-                    pass  # field doesn't exist in ret so ignore
-
-        return ret
+        exposed = self._check_exposure(instance)
+        if exposed:
+            self._hidden_fields = ()
+        else:
+            request = self.context.get("request")
+            self._hidden_fields = get_policy(type(self)).get_hidden_fields(
+                getattr(request, "user", None)
+            )
+        hand_down_exposure(self, instance, exposed)
+        return super().to_representation(instance)
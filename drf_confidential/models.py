@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class ObjectGrant(models.Model):
+    """A permission granted to a user on a single object.
+
+    Read by `ObjectGrantBackend`, so that a confidential permission
+    can be held on some rows of a model only.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="confidential_grants",
+    )
+    permission = models.ForeignKey(Permission, on_delete=models.CASCADE)
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_pk = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ("user", "content_type", "object_pk", "permission")
+
+    def __str__(self):
+        return "{} on {} {}".format(
+            self.permission.codename, self.content_type, self.object_pk
+        )
+
+
+class AccessEntry(models.Model):
+    """A row linked to a user through one of its relation lookups.
+
+    The materialized access index, maintained for the ownership and
+    `user_relation` lookups that take more than the row itself to
+    resolve, so that they are checked with a single indexed lookup
+    whatever their depth.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="confidential_access",
+    )
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_pk = models.CharField(max_length=255)
+    lookup = models.CharField(max_length=255)
+
+    class Meta:
+        unique_together = ("user", "content_type", "object_pk", "lookup")
+        indexes = [
+            models.Index(fields=["content_type", "lookup", "object_pk"])
+        ]
+
+    def __str__(self):
+        return "{} {} via {}".format(
+            self.content_type, self.object_pk, self.lookup
+        )
@@ -0,0 +1,160 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.serializers import ListSerializer
+
+from . import reasons
+from .decisions import get_fast_decision, report_exposure
+from .lookups import compile_lookup, get_relation_field
+from .policy import get_policy
+
+INHERIT = "inherit"
+RELATION = "relation"
+
+# A nested confidential serializer deciding from its parent.
+#
+# `mode` is `INHERIT` to take the parent's decision as is, or
+# `RELATION` to follow the rest of the nested policy's path from the
+# parent: `path` is that rest compiled on the parent's model, or
+# `None` when the parent is where the path ends. `exclusive` tells
+# whether that path is the only way the nested rows link to users.
+NestedExposure = namedtuple(
+    "NestedExposure", ("field_name", "mode", "path", "exclusive")
+)
+
+
+def _get_reverse_accessor(field):
+    """Return the accessor of the relation back from its related model."""
+    if field.concrete:
+        return field.remote_field.get_accessor_name()
+    return field.field.name
+
+
+def _derive_path(parent_policy, policy, field_name, source):
+    """Return the rest of the policy's path after the traversed relation."""
+    field = get_relation_field(parent_policy.model, source)
+    if not field.one_to_one:
+        raise ImproperlyConfigured(
+            "{}.{} must traverse a one-to-one relation to derive its "
+            "exposure.".format(
+                parent_policy.serializer_class.__name__, field_name
+            )
+        )
+    reverse = _get_reverse_accessor(field)
+    paths = ((policy.ownership,) if policy.ownership else ()) + (
+        policy.relations
+    )
+    for path in paths:
+        accessor, _, rest = path.lookup.partition("__")
+        if accessor == reverse:
+            return (
+                compile_lookup(parent_policy.model, rest) if rest else None,
+                len(paths) == 1 and not policy.is_user_model,
+            )
+    raise ImproperlyConfigured(
+        "{} has no user lookup through `{}`, the relation {}.{} "
+        "traverses.".format(
+            policy.serializer_class.__name__,
+            reverse,
+            parent_policy.serializer_class.__name__,
+            field_name,
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def get_nested_exposures(serializer_class):
+    """Compile the `confidential_nested` declarations of the class."""
+    from .mixins import ConfidentialFieldsMixin  # avoid a circular import
+
+    declared = getattr(
+        getattr(serializer_class, "Meta", None), "confidential_nested", {}
+    )
+    if not declared:
+        return ()
+    parent_policy = get_policy(serializer_class)
+    fields = serializer_class(context={}).fields
+    nested = []
+    for field_name, mode in declared.items():
+        field = fields.get(field_name)
+        child = field.child if isinstance(field, ListSerializer) else field
+        if not isinstance(child, ConfidentialFieldsMixin):
+            raise ImproperlyConfigured(
+                "{}.{} is not a confidential serializer.".format(
+                    serializer_class.__name__, field_name
+                )
+            )
+        if mode == INHERIT:
+            path, exclusive = None, True
+        elif mode == RELATION and child is field:
+            path, exclusive = _derive_path(
+                parent_policy,
+                get_policy(type(child)),
+                field_name,
+                field.source,
+            )
+        else:
+            raise ImproperlyConfigured(
+                "{}.{} must be nested with `{}`, or with `{}` when it "
+                "is not a list.".format(
+                    serializer_class.__name__, field_name, INHERIT, RELATION
+                )
+            )
+        nested.append(NestedExposure(field_name, mode, path, exclusive))
+    return tuple(nested)
+
+
+def _derive(nested, policy, parent, user):
+    """Return the nested decision derived from the parent, if definite."""
+    if policy.has_permission(user):
+        return True, reasons.PERMISSION
+    if nested.path is None:
+        linked = user.pk is not None and parent.pk == user.pk
+    else:
+        linked = nested.path.is_linked(parent, user)
+    if linked:
+        return True, reasons.RELATION
+    if nested.exclusive and policy.get_grant_q(user) is None:
+        return False, reasons.DENIED
+    return None
+
+
+def decide_from_parent(serializer, instance):
+    """Return the serializer's decision taken from its parent, if any.
+
+    The parent confidential serializer hands its instance and its
+    decision down to the serializers declared in `confidential_nested`
+    before representing them. Returns `None` when the decision is
+    left to the serializer's own check.
+    """
+    parent = serializer._parent_exposure
+    if parent is None:
+        return None
+    nested, parent_instance, parent_exposed = parent
+
+    request = serializer.context.get("request")
+    user = getattr(request, "user", None)
+    policy = get_policy(type(serializer))
+    if get_fast_decision(user) is not None:
+        return None
+    if nested.mode == INHERIT:
+        if policy.has_permission(user):
+            decision = True, reasons.PERMISSION
+        else:
+            decision = parent_exposed, reasons.INHERITED
+    else:
+        decision = _derive(nested, policy, parent_instance, user)
+        if decision is None:
+            return None
+    report_exposure(policy, request, instance, *decision)
+    return decision[0]
+
+
+def hand_down_exposure(serializer, instance, exposed):
+    """Hand the decision on the instance to its nested serializers."""
+    for nested in get_nested_exposures(type(serializer)):
+        field = serializer.fields[nested.field_name]
+        child = field.child if isinstance(field, ListSerializer) else field
+        child._parent_exposure = (nested, instance, exposed)
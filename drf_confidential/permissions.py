@@ -1,63 +1,169 @@
+from functools import wraps
+from time import perf_counter
+
 from django.conf import settings
+from django.core import checks
+from django.urls import get_resolver
 
 from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+
+from .decisions import acheck_exposure, check_exposure
+from .policy import get_policy
+from .signals import permission_checked
+
+
+def _send_checked(permission, request, view, check, granted, start):
+    permission_checked.send(
+        sender=type(permission),
+        request=request,
+        view=view,
+        method=check.__name__,
+        granted=granted,
+        duration=perf_counter() - start,
+    )
+
+
+def _timed(check):
+    """Report the outcome and duration of a permission check."""
+
+    @wraps(check)
+    def wrapper(self, request, view, *args):
+        if not permission_checked.receivers:
+            return check(self, request, view, *args)
+        start = perf_counter()
+        granted = check(self, request, view, *args)
+        _send_checked(self, request, view, check, granted, start)
+        return granted
+
+    return wrapper
 
-from .mixins import ConfidentialFieldsMixin
 
-permission_template = getattr(
-    settings,
-    "CONFIDENTIAL_PERMISSION_TEMPLATE",
-    "view_sensitive_{model_name}",
-)
+def _atimed(check):
+    """Report the outcome and duration of an async permission check."""
+
+    @wraps(check)
+    async def wrapper(self, request, view, *args):
+        if not permission_checked.receivers:
+            return await check(self, request, view, *args)
+        start = perf_counter()
+        granted = await check(self, request, view, *args)
+        _send_checked(self, request, view, check, granted, start)
+        return granted
+
+    return wrapper
 
 
 class ConfidentialFieldsPermission(BasePermission):
-    def has_permission(self, request, view):
-        serializer = view.get_serializer()
-        app_label = serializer.Meta.model._meta.app_label
-        model_name = serializer.Meta.model._meta.model_name
-        confidential_permission = (
-            app_label
-            + "."
-            + getattr(
-                serializer.Meta, "confidential_permission", permission_template
-            ).format(model_name=model_name)
-        )
+    """Restrict writes to users allowed to see confidential fields.
+
+    The rules are read from the compiled policy of the view's
+    serializer class, so that no serializer is instantiated.
+    """
 
+    @_timed
+    def has_permission(self, request, view):
         # A user without the confidential permission should still be
         # able to list/update/delete records if the record is self or
         # self-owned. Therefore, these actions should be allowed for
         # the user even if the user does't have the confidential
         # permission.
-        if view.action == "create":
-            return request.user.has_perm(confidential_permission)
+        if view.action in ("create", "bulk_create"):
+            policy = get_policy(view.get_serializer_class())
+            return policy.has_permission(request.user)
         return True
 
+    @_timed
     def has_object_permission(self, request, view, obj):
-        serializer = view.get_serializer()
-        app_label = obj._meta.app_label
-        model_name = obj._meta.model_name
-        confidential_permission = (
-            app_label
-            + "."
-            + getattr(
-                serializer.Meta, "confidential_permission", permission_template
-            ).format(model_name=model_name)
-        )
-        user_link = getattr(serializer.Meta, "user_relation", None)
-
         # Any user should be allowed to use the retrieve action, due to
         # the serializer determining which fields to expose.
         if view.action == "retrieve":
             return True
-        if request.user.has_perm(confidential_permission):
-            return True
-        if obj == request.user:
+
+        policy = get_policy(view.get_serializer_class())
+        return check_exposure(policy, request, obj)
+
+
+class AsyncConfidentialFieldsPermission(BasePermission):
+    """Async variant of `ConfidentialFieldsPermission`.
+
+    For async views, e.g. those of adrf, under ASGI. Permission and
+    relation lookups are awaited instead of blocking the event loop.
+    Views that do not await permission checks would take the returned
+    coroutines for grants; the `drf_confidential.E001` system check
+    reports routed ones.
+    """
+
+    @_atimed
+    async def has_permission(self, request, view):
+        if view.action in ("create", "bulk_create"):
+            policy = get_policy(view.get_serializer_class())
+            return await policy.ahas_permission(request.user)
+        return True
+
+    @_atimed
+    async def has_object_permission(self, request, view, obj):
+        if view.action == "retrieve":
             return True
-        if user_link:
-            field_lookups = user_link.split("__")
-            return (
-                ConfidentialFieldsMixin._resolve_lookups(obj, field_lookups)
-                == request.user
+
+        policy = get_policy(view.get_serializer_class())
+        return await acheck_exposure(policy, request, obj)
+
+
+def _uses_async_permission(permission):
+    """Return whether the permission class, or composition, is async."""
+    if isinstance(permission, type):
+        return issubclass(permission, AsyncConfidentialFieldsPermission)
+    # Compositions such as `IsAuthenticated & ...`
+    return any(
+        _uses_async_permission(getattr(permission, name))
+        for name in ("op1_class", "op2_class")
+        if hasattr(permission, name)
+    )
+
+
+def _iter_view_classes(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from _iter_view_classes(pattern.url_patterns)
+        else:
+            view_class = getattr(pattern.callback, "cls", None)
+            if view_class is not None:
+                yield view_class
+
+
+def check_async_permissions(app_configs=None, **kwargs):
+    """Report routed views that would not await async permissions."""
+    if not getattr(settings, "ROOT_URLCONF", None):
+        return []
+    errors = []
+    seen = set()
+    for view_class in _iter_view_classes(get_resolver().url_patterns):
+        if view_class in seen:
+            continue
+        seen.add(view_class)
+        if not any(
+            _uses_async_permission(permission)
+            for permission in getattr(view_class, "permission_classes", ())
+        ):
+            continue
+        if (
+            view_class.check_permissions is APIView.check_permissions
+            or view_class.check_object_permissions
+            is APIView.check_object_permissions
+        ):
+            errors.append(
+                checks.Error(
+                    "{} uses AsyncConfidentialFieldsPermission but does "
+                    "not await permission checks.".format(
+                        view_class.__qualname__
+                    ),
+                    hint=(
+                        "Use ConfidentialFieldsPermission, or an async "
+                        "view such as those of adrf."
+                    ),
+                    obj=view_class,
+                    id="drf_confidential.E001",
+                )
             )
-        return False
+    return errors
@@ -0,0 +1,419 @@
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from . import reasons
+from .compat import aexists, aget_all_permissions, run_sync
+from .decisions import get_fast_decision
+from .lookups import compile_user_lookup, get_ownership_path
+
+permission_template = getattr(
+    settings,
+    "CONFIDENTIAL_PERMISSION_TEMPLATE",
+    "view_sensitive_{model_name}",
+)
+ownership_field = getattr(
+    settings, "CONFIDENTIAL_OWNERSHIP_FIELD", "created_by"
+)
+object_permission_backend = getattr(
+    settings, "CONFIDENTIAL_OBJECT_PERMISSION_BACKEND", None
+)
+use_access_index = getattr(settings, "CONFIDENTIAL_ACCESS_INDEX", False)
+
+# Serializer classes defined before the app registry was ready, and
+# the compiled policies.
+_pending_classes = []
+_policies = {}
+
+
+class ConfidentialPolicy:
+    """Confidentiality rules of a serializer class.
+
+    The rules declared on the serializer's `Meta` are read, compiled
+    and validated once, so that deciding exposure on a request does
+    not have to rebuild the permission name or re-parse the relation
+    lookups. Policies are immutable.
+    """
+
+    __slots__ = (
+        "serializer_class",
+        "model",
+        "groups",
+        "permissions",
+        "fields",
+        "columns",
+        "relations",
+        "ownership",
+        "indexed",
+        "is_user_model",
+        "is_local",
+    )
+
+    def __init__(self, serializer_class):
+        meta = getattr(serializer_class, "Meta", None)
+        model = getattr(meta, "model", None)
+        if model is None:
+            raise ImproperlyConfigured(
+                "{} must define `Meta.model`.".format(
+                    serializer_class.__name__
+                )
+            )
+
+        groups = {}
+        if hasattr(meta, "confidential_fields"):
+            codename = getattr(
+                meta, "confidential_permission", permission_template
+            ).format(model_name=model._meta.model_name)
+            groups[codename] = set(meta.confidential_fields)
+        for codename, fields in getattr(
+            meta, "confidential_field_groups", {}
+        ).items():
+            groups.setdefault(codename, set()).update(fields)
+        if not groups:
+            raise ImproperlyConfigured(
+                "{} must define `Meta.confidential_fields` or "
+                "`Meta.confidential_field_groups`.".format(
+                    serializer_class.__name__
+                )
+            )
+        groups = tuple(
+            (
+                (
+                    codename
+                    if "." in codename
+                    else model._meta.app_label + "." + codename
+                ),
+                frozenset(fields),
+            )
+            for codename, fields in groups.items()
+        )
+        user_relation = getattr(meta, "user_relation", None) or ()
+        if isinstance(user_relation, str):
+            user_relation = (user_relation,)
+
+        set_attribute = super().__setattr__
+        set_attribute("serializer_class", serializer_class)
+        set_attribute("model", model)
+        set_attribute("groups", groups)
+        set_attribute(
+            "permissions", frozenset(permission for permission, _ in groups)
+        )
+        set_attribute(
+            "fields", frozenset().union(*(fields for _, fields in groups))
+        )
+        set_attribute(
+            "columns",
+            tuple(
+                field.name
+                for field in model._meta.concrete_fields
+                if field.name in self.fields
+                and not field.primary_key
+                and not field.is_relation
+            ),
+        )
+        set_attribute(
+            "relations",
+            tuple(
+                compile_user_lookup(model, lookup) for lookup in user_relation
+            ),
+        )
+        set_attribute("ownership", get_ownership_path(model, ownership_field))
+        set_attribute("indexed", self._get_indexed())
+        set_attribute(
+            "is_user_model",
+            model._meta.concrete_model
+            is get_user_model()._meta.concrete_model,
+        )
+        set_attribute(
+            "is_local",
+            all(path.is_local for path, _ in self._iter_paths()),
+        )
+
+    def _get_indexed(self):
+        if not use_access_index:
+            return ()
+        from .access import needs_index
+
+        return tuple(
+            path for path, _ in self._iter_paths() if needs_index(path)
+        )
+
+    def _iter_paths(self):
+        """Yield the relation paths linking rows to users, with reasons."""
+        if self.ownership is not None:
+            yield self.ownership, reasons.OWNERSHIP
+        for path in self.relations:
+            yield path, reasons.RELATION
+
+    def _get_indexed_reason(self, lookup):
+        for path, reason in self._iter_paths():
+            if path.lookup == lookup:
+                return reason
+        return None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ConfidentialPolicy is immutable.")
+
+    def __repr__(self):
+        return "<ConfidentialPolicy {}>".format(self.serializer_class.__name__)
+
+    def has_permission(self, user):
+        """Return whether the user holds the permissions of every group.
+
+        Active superusers hold every permission, whether or not it
+        exists, and anonymous users none.
+        """
+        decision = get_fast_decision(user)
+        if decision is not None:
+            return decision
+        return self.permissions <= get_user_permissions(user)
+
+    async def ahas_permission(self, user):
+        """Async variant of `has_permission`."""
+        decision = get_fast_decision(user)
+        if decision is not None:
+            return decision
+        return self.permissions <= await aget_user_permissions(user)
+
+    def get_hidden_fields(self, user):
+        """Return the fields hidden from the user unless linked.
+
+        A field is shown if the user holds the permission of any
+        group it belongs to. The result is cached on the user object.
+        """
+        if user is None:
+            return self.fields
+        try:
+            cache = user._confidential_hidden_fields
+        except AttributeError:
+            cache = user._confidential_hidden_fields = {}
+        try:
+            return cache[self]
+        except KeyError:
+            pass
+        permissions = get_user_permissions(user)
+        hidden = cache[self] = self.fields.difference(
+            *(
+                fields
+                for permission, fields in self.groups
+                if permission in permissions
+            )
+        )
+        return hidden
+
+    def get_hidden_columns(self, user):
+        """Return the columns of the fields hidden from the user."""
+        hidden = self.get_hidden_fields(user)
+        return tuple(column for column in self.columns if column in hidden)
+
+    def explain(self, instance, user):
+        """Return how the instance is exposed to the user.
+
+        Returns the reason of the exposure, or `None` if the instance
+        is not exposed.
+        """
+        if self.has_permission(user):
+            return reasons.PERMISSION
+        reason = self.get_link(instance, user)
+        if reason is None and instance.pk is not None:
+            grant_q = self.get_grant_q(user)
+            if (
+                grant_q is not None
+                and self.model._default_manager.filter(
+                    grant_q, pk=instance.pk
+                ).exists()
+            ):
+                reason = reasons.GRANT
+        return reason
+
+    def get_link(self, instance, user):
+        """Return how the instance is linked to the user, if it is.
+
+        The instance may be the user, be owned by the user or be
+        related to the user through any of the `user_relation` lookups.
+        Paths kept in the access index are checked together, with a
+        single indexed lookup.
+        """
+        if user.pk is None:
+            return None
+        if self.is_user_model and instance.pk == user.pk:
+            return reasons.SELF
+        indexed = self.indexed if instance.pk is not None else ()
+        for path, reason in self._iter_paths():
+            if path not in indexed and path.is_linked(instance, user):
+                return reason
+        if indexed:
+            from .access import get_linked_lookup
+
+            return self._get_indexed_reason(
+                get_linked_lookup(self.model, indexed, instance.pk, user)
+            )
+        return None
+
+    async def aexplain(self, instance, user):
+        """Async variant of `explain`."""
+        if await self.ahas_permission(user):
+            return reasons.PERMISSION
+        reason = await self.aget_link(instance, user)
+        if reason is None and instance.pk is not None:
+            # Building the grants' subquery may look the content type up.
+            grant_q = await run_sync(self.get_grant_q)(user)
+            if grant_q is not None and await aexists(
+                self.model._default_manager.filter(grant_q, pk=instance.pk)
+            ):
+                reason = reasons.GRANT
+        return reason
+
+    async def aget_link(self, instance, user):
+        """Async variant of `get_link`."""
+        if user.pk is None:
+            return None
+        if self.is_user_model and instance.pk == user.pk:
+            return reasons.SELF
+        indexed = self.indexed if instance.pk is not None else ()
+        for path, reason in self._iter_paths():
+            if path not in indexed and await path.ais_linked(instance, user):
+                return reason
+        if indexed:
+            from .access import aget_linked_lookup
+
+            return self._get_indexed_reason(
+                await aget_linked_lookup(
+                    self.model, indexed, instance.pk, user
+                )
+            )
+        return None
+
+    def is_exposed(self, instance, user):
+        """Return whether the instance is exposed to the user."""
+        return self.explain(instance, user) is not None
+
+    def get_link_q(self, user):
+        """Build a Q object matching the rows linked to the user.
+
+        Returns `None` when no row of the model can be linked to a
+        user.
+        """
+        q_objects = []
+        if self.is_user_model:
+            q_objects.append(Q(pk=user.pk))
+        for path, _ in self._iter_paths():
+            if path not in self.indexed:
+                q_objects.append(Q(**{path.query_path: user}))
+        if self.indexed:
+            from .access import get_linked_queryset
+
+            q_objects.append(
+                Q(pk__in=get_linked_queryset(self.model, self.indexed, user))
+            )
+
+        if not q_objects:
+            return None
+        q = q_objects.pop(0)
+        for q_object in q_objects:
+            q |= q_object
+        return q
+
+    def get_grant_q(self, user):
+        """Build a Q object matching the rows granted to the user.
+
+        The rows are those on which the object permission backend
+        grants the user every permission the user lacks model-wide.
+        Returns `None` without a backend, or when nothing is lacking.
+        """
+        backend = get_object_permission_backend()
+        if backend is None or user.pk is None:
+            return None
+        missing = self.permissions - get_user_permissions(user)
+        if not missing:
+            return None
+        return Q(
+            pk__in=backend.get_granted_queryset(
+                user, self.model, sorted(missing)
+            )
+        )
+
+    def get_access_q(self, user):
+        """Build a Q object matching the rows exposed to the user.
+
+        Combines the rows linked to the user and those granted to the
+        user on the object level. Returns `None` when no row can be.
+        """
+        link_q = self.get_link_q(user)
+        grant_q = self.get_grant_q(user)
+        if link_q is None or grant_q is None:
+            return grant_q if link_q is None else link_q
+        return link_q | grant_q
+
+
+@lru_cache(maxsize=None)
+def get_object_permission_backend():
+    """Return the configured object permission backend, if any."""
+    if object_permission_backend is None:
+        return None
+    return import_string(object_permission_backend)()
+
+
+def get_user_permissions(user):
+    """Return the user's permissions, fetched once per user object.
+
+    Like Django's own permission caches, the set lives on the user
+    object, so that every group is resolved from a single fetch.
+    """
+    try:
+        return user._confidential_permissions
+    except AttributeError:
+        permissions = frozenset(user.get_all_permissions())
+        user._confidential_permissions = permissions
+        return permissions
+
+
+async def aget_user_permissions(user):
+    """Async variant of `get_user_permissions`."""
+    try:
+        return user._confidential_permissions
+    except AttributeError:
+        permissions = frozenset(await aget_all_permissions(user))
+        user._confidential_permissions = permissions
+        return permissions
+
+
+def register(serializer_class):
+    """Register a serializer class using `ConfidentialFieldsMixin`.
+
+    Classes defined once the app registry is ready are compiled right
+    away; earlier ones are compiled when the app config is ready.
+    """
+    meta = getattr(serializer_class, "Meta", None)
+    if getattr(meta, "model", None) is None:
+        return  # abstract serializer, nothing to compile
+    if apps.models_ready:
+        get_policy(serializer_class)
+    else:
+        _pending_classes.append(serializer_class)
+
+
+def compile_policies():
+    """Compile the policies of the serializer classes pending."""
+    while _pending_classes:
+        get_policy(_pending_classes.pop(0))
+
+
+def get_policy(serializer_class):
+    """Return the compiled policy of the serializer class."""
+    try:
+        return _policies[serializer_class]
+    except KeyError:
+        policy = _policies[serializer_class] = ConfidentialPolicy(
+            serializer_class
+        )
+        if policy.indexed:
+            from .access import track
+
+            track(policy)
+        return policy
@@ -0,0 +1,82 @@
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from .decisions import exposure_annotation, get_fast_decision
+from .policy import get_policy
+
+
+def get_uniform_decision(policy, user):
+    """Return the exposure decision holding for every row.
+
+    Returns `None` when the decision depends on the row.
+    """
+    decision = get_fast_decision(user)
+    if decision is not None:
+        return decision
+    if policy.has_permission(user):
+        return True
+    if policy.get_access_q(user) is None:
+        return False
+    return None
+
+
+def annotate_exposure(queryset, serializer_class, user):
+    """Annotate each row of the queryset with its exposure flag.
+
+    The flag is computed in SQL from the serializer's confidential
+    permission, the ownership field and the `user_relation` lookup,
+    so that serializing the rows does not need to traverse any
+    relation. `ConfidentialFieldsMixin` reads the flag instead of
+    running its own check.
+    """
+    policy = get_policy(serializer_class)
+    decision = get_uniform_decision(policy, user)
+
+    if decision is not None:
+        expression = Value(decision, output_field=BooleanField())
+    else:
+        model = queryset.model
+        expression = Exists(
+            model._default_manager.filter(
+                policy.get_access_q(user), pk=OuterRef("pk")
+            )
+        )
+    return queryset.annotate(**{exposure_annotation: expression})
+
+
+def filter_exposure(queryset, serializer_class, user, exposed=True):
+    """Filter the queryset on whether rows are exposed to the user.
+
+    The rows are restricted in SQL, with a single subquery over the
+    rows linked to the user when the decision depends on the row.
+    Confidential columns are deferred when keeping hidden rows only.
+    """
+    policy = get_policy(serializer_class)
+    decision = get_uniform_decision(policy, user)
+
+    if decision is not None:
+        if decision != exposed:
+            return queryset.none()
+        if not exposed:
+            return queryset.defer(*policy.get_hidden_columns(user))
+        return queryset
+    linked = queryset.model._default_manager.filter(
+        policy.get_access_q(user)
+    ).values("pk")
+    if exposed:
+        return queryset.filter(pk__in=linked)
+    return queryset.exclude(pk__in=linked).defer(
+        *policy.get_hidden_columns(user)
+    )
+
+
+def defer_confidential(queryset, serializer_class, user):
+    """Defer the confidential columns if no row is exposed to the user.
+
+    Only plain columns named after a confidential field hidden from
+    the user are deferred, so that they are not fetched for users who
+    never receive them.
+    """
+    policy = get_policy(serializer_class)
+    if not policy.columns or get_uniform_decision(policy, user) is not False:
+        return queryset
+    return queryset.defer(*policy.get_hidden_columns(user))
@@ -0,0 +1,27 @@
+"""How exposure decisions are reached.
+
+Reported by the instrumentation signals along with every decision.
+"""
+
+# The user is anonymous, nothing is exposed.
+ANONYMOUS = "anonymous"
+# The user is an active superuser, everything is exposed.
+SUPERUSER = "superuser"
+# The user has the confidential permission of the model.
+PERMISSION = "permission"
+# The instance is the user.
+SELF = "self"
+# The user owns the instance through the ownership field.
+OWNERSHIP = "ownership"
+# A `user_relation` lookup resolves to the user.
+RELATION = "relation"
+# The user holds the confidential permission on the instance itself.
+GRANT = "grant"
+# The instance is not exposed to the user.
+DENIED = "denied"
+# The decision was read from the queryset annotation.
+ANNOTATION = "annotation"
+# The decision was memoized earlier in the request.
+MEMO = "memo"
+# The decision was taken from the parent serializer's.
+INHERITED = "inherited"
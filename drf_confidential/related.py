@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework.serializers import ListSerializer
+
+from .lookups import compile_lookup
+from .mixins import ConfidentialFieldsMixin
+from .nesting import get_nested_exposures
+from .policy import get_policy
+
+
+def _path_chain(path):
+    hops = path.hops
+    if hops[-1].attname is not None:
+        # compared by id, the related object is not needed
+        hops = hops[:-1]
+    return hops
+
+
+def _policy_chains(policy, include_own):
+    """Yield the chains of hops the policy's checks traverse."""
+    if include_own:
+        for path in (policy.ownership,) + policy.relations:
+            if path is None or path in policy.indexed:
+                continue
+            hops = _path_chain(path)
+            if hops:
+                yield hops
+
+    nested = {
+        declared.field_name: declared
+        for declared in get_nested_exposures(policy.serializer_class)
+    }
+    serializer = policy.serializer_class(context={})
+    for field_name, field in serializer.fields.items():
+        child = field.child if isinstance(field, ListSerializer) else field
+        if not isinstance(child, ConfidentialFieldsMixin):
+            continue
+        try:
+            hop = compile_lookup(policy.model, field.source).hops[0]
+        except ImproperlyConfigured:
+            continue  # not a plain relation, e.g. a dotted source
+        yield (hop,)
+        # Nested serializers deciding from their parent only need the
+        # rest of their path from the parent.
+        declared = nested.get(field_name)
+        if declared is not None and declared.path is not None:
+            hops = _path_chain(declared.path)
+            if hops:
+                yield hops
+        for chain in _policy_chains(get_policy(type(child)), not declared):
+            yield (hop,) + chain
+
+
+def _remove_prefixes(lookups):
+    return sorted(
+        lookup
+        for lookup in lookups
+        if not any(other.startswith(lookup + "__") for other in lookups)
+    )
+
+
+@lru_cache(maxsize=None)
+def get_related_lookups(serializer_class, include_own=True):
+    """Plan the related lookups needed by the serializer's checks.
+
+    Returns a pair of `select_related` and `prefetch_related` lookups
+    covering the relations traversed to decide exposure, both for the
+    serializer and its nested confidential serializers. Single-valued
+    relations are joined, multi-valued ones are prefetched. The
+    serializer's own relations can be left out with `include_own`,
+    e.g. when its rows are annotated with their exposure.
+    """
+    select_related = set()
+    prefetch_related = set()
+    policy = get_policy(serializer_class)
+    for chain in _policy_chains(policy, include_own):
+        multiple = [index for index, hop in enumerate(chain) if hop.multiple]
+        if not multiple:
+            select_related.add("__".join(hop.query_name for hop in chain))
+            continue
+        if multiple[0]:
+            select_related.add(
+                "__".join(hop.query_name for hop in chain[: multiple[0]])
+            )
+        prefetch_related.add("__".join(hop.accessor for hop in chain))
+    return (
+        tuple(_remove_prefixes(select_related)),
+        tuple(_remove_prefixes(prefetch_related)),
+    )
+
+
+def select_exposure_related(queryset, serializer_class, include_own=True):
+    """Apply the serializer's related lookups to the queryset."""
+    select_related, prefetch_related = get_related_lookups(
+        serializer_class, include_own
+    )
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .signals import bulk_saved
+
+cache_size = getattr(settings, "CONFIDENTIAL_RELATION_CACHE_SIZE", 0)
+cache_timeout = getattr(settings, "CONFIDENTIAL_RELATION_CACHE_TIMEOUT", 60)
+dispatch_uid = "drf_confidential.resolution"
+
+
+class RelationCache:
+    """Process-wide LRU of the users relation paths resolve to.
+
+    Entries are keyed by the compiled path and the primary key of the
+    row it starts from. They expire after `timeout` seconds, and are
+    dropped as soon as a row along their path is saved or deleted in
+    this process; changes made by other processes are only picked up
+    once the entries expire.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._generations = {}
+
+    def get(self, path, pk):
+        """Return the cached user ids of the path for the row, if any."""
+        key = (path, pk)
+        with self._lock:
+            try:
+                user_ids, expires, generation = self._entries[key]
+            except KeyError:
+                return None
+            if expires <= monotonic() or generation != self._generations.get(
+                path, 0
+            ):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user_ids
+
+    def set(self, path, pk, user_ids):
+        """Cache the user ids the path resolves to for the row."""
+        _track(path)
+        with self._lock:
+            self._entries[(path, pk)] = (
+                frozenset(user_ids),
+                monotonic() + self.timeout,
+                self._generations.get(path, 0),
+            )
+            self._entries.move_to_end((path, pk))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def forget(self, path, pks):
+        """Drop the entries of the path for the rows."""
+        with self._lock:
+            for pk in pks:
+                self._entries.pop((path, pk), None)
+
+    def invalidate(self, path):
+        """Drop every entry of the path."""
+        with self._lock:
+            self._generations[path] = self._generations.get(path, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+relation_cache = (
+    RelationCache(cache_size, cache_timeout) if cache_size else None
+)
+
+
+def get_relation_cache():
+    """Return the relation cache, or `None` if it is disabled."""
+    return relation_cache
+
+
+# The positions along the cached paths of every model whose changes
+# can relink their rows.
+_tracked = {}
+_tracked_paths = set()
+_track_lock = Lock()
+
+
+def _changed(sender, pks):
+    cache = get_relation_cache()
+    if cache is None:
+        return
+    for path, index in _tracked.get(sender._meta.concrete_model, ()):
+        if index == 0:
+            cache.forget(path, pks)
+        else:
+            cache.invalidate(path)
+
+
+def _saved_or_deleted(sender, instance, **kwargs):
+    _changed(sender, [instance.pk])
+
+
+def _bulk_saved(sender, instances, **kwargs):
+    _changed(sender, [instance.pk for instance in instances])
+
+
+def _m2m_changed(sender, instance, action, model, pk_set, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        _changed(type(instance), [instance.pk])
+        _changed(model, pk_set or ())
+
+
+def _connect(model):
+    model = model._meta.concrete_model
+    post_save.connect(
+        _saved_or_deleted, sender=model, dispatch_uid=dispatch_uid
+    )
+    post_delete.connect(
+        _saved_or_deleted, sender=model, dispatch_uid=dispatch_uid
+    )
+    bulk_saved.connect(_bulk_saved, sender=model, dispatch_uid=dispatch_uid)
+
+
+def _track(path):
+    """Watch every model along the path, once."""
+    with _track_lock:
+        if path in _tracked_paths:
+            return
+        _tracked_paths.add(path)
+        _watch(path)
+
+
+def _watch(path):
+    model = path.model
+    for index, hop in enumerate(path.hops):
+        _tracked.setdefault(model._meta.concrete_model, []).append(
+            (path, index)
+        )
+        _connect(model)
+        field = model._meta.get_field(hop.query_name)
+        if field.many_to_many:
+            through = (
+                field.remote_field.through if field.concrete else field.through
+            )
+            m2m_changed.connect(
+                _m2m_changed, sender=through, dispatch_uid=dispatch_uid
+            )
+        model = field.related_model
+    _tracked.setdefault(model._meta.concrete_model, []).append(
+        (path, len(path.hops))
+    )
+    _connect(model)
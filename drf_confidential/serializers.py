@@ -0,0 +1,128 @@
+from itertools import islice
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+
+from rest_framework.fields import get_attribute
+from rest_framework.serializers import ListSerializer
+
+from .decisions import clear_exposure, decide_exposures, get_fast_decision
+from .nesting import INHERIT, get_nested_exposures
+from .policy import get_policy
+from .values import iter_values
+
+
+def _get_related(instances, field, many):
+    """Collect the objects a nested field serializes for the instances."""
+    related = []
+    for instance in instances:
+        try:
+            value = get_attribute(instance, field.source_attrs)
+        except (ObjectDoesNotExist, AttributeError, KeyError):
+            continue
+        if value is None:
+            continue
+        if not many:
+            related.append(value)
+        elif isinstance(value, models.Manager):
+            related.extend(value.all())
+        else:
+            related.extend(value)
+    return related
+
+
+def _decide_nested(serializer, instances, request):
+    """Decide the nested confidential objects of the whole list at once.
+
+    Nested lists would otherwise be decided once per row, and grants
+    looked up once per nested object, so both are decided for the
+    whole list instead. Other nested objects are decided by following
+    the relations joined into the queryset, at no cost.
+    """
+    from .mixins import ConfidentialFieldsMixin  # avoid a circular import
+
+    user = request.user
+    inherited = {
+        nested.field_name
+        for nested in get_nested_exposures(type(serializer))
+        if nested.mode == INHERIT
+    }
+    for field_name, field in serializer.fields.items():
+        many = isinstance(field, ListSerializer)
+        child = field.child if many else field
+        if not isinstance(child, ConfidentialFieldsMixin):
+            continue
+        related = _get_related(instances, field, many)
+        if not related:
+            continue
+        policy = get_policy(type(child))
+        if field_name not in inherited and (
+            many or policy.get_grant_q(user) is not None
+        ):
+            decide_exposures(policy, request, related)
+        _decide_nested(child, related, request)
+
+
+class ConfidentialListSerializer(ListSerializer):
+    """List serializer deciding exposure for all items up front.
+
+    Instead of letting every child resolve the request user's
+    relation on its own, the primary keys exposed to the user are
+    fetched in a single query and memoized for the children.
+    """
+
+    def _decide_exposure(self, instances):
+        """Decide exposure of the instances in a single query."""
+        request = self.context.get("request")
+        if get_fast_decision(getattr(request, "user", None)) is not None:
+            return
+        parent = self.child._parent_exposure
+        if parent is not None and parent[0].mode == INHERIT:
+            return  # the items take their parent's decision
+        decide_exposures(get_policy(type(self.child)), request, instances)
+        _decide_nested(self.child, instances, request)
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        instances = list(iterable)
+        self._decide_exposure(instances)
+        return super().to_representation(instances)
+
+    def iter_representation(self, data, chunk_size=2000):
+        """Yield the representation of the items, chunk by chunk.
+
+        Querysets are read with `iterator()`. Their prefetches and the
+        exposure of their items are handled one chunk at a time, and
+        the decisions are dropped once the chunk is written, so that
+        memory does not grow with the number of rows.
+        """
+        if isinstance(data, models.Manager):
+            data = data.all()
+        lookups = ()
+        if isinstance(data, models.QuerySet):
+            lookups = data._prefetch_related_lookups
+            data = data.prefetch_related(None).iterator(chunk_size=chunk_size)
+
+        request = self.context.get("request")
+        iterator = iter(data)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            if lookups:
+                models.prefetch_related_objects(chunk, *lookups)
+            self._decide_exposure(chunk)
+            for instance in chunk:
+                yield self.child.to_representation(instance)
+            clear_exposure(request)
+
+    def iter_values(self, data, chunk_size=2000):
+        """Yield the representation of the queryset's rows as values.
+
+        A faster `iter_representation` for serializers whose readable
+        fields all read a column of the row or of a forward relation,
+        which builds no model instance. See `values.iter_values`.
+        """
+        if isinstance(data, models.Manager):
+            data = data.all()
+        return iter_values(self.child, data, chunk_size=chunk_size)
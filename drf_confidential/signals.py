@@ -0,0 +1,24 @@
+from django.dispatch import Signal
+
+# Sent once an exposure decision is reached, with the `policy`,
+# `request`, `instance`, whether it is `exposed`, the `reason` of the
+# decision (see `drf_confidential.reasons`), the number of `queries`
+# run to decide (`None` for async checks) and the `duration` of the
+# check in seconds. The sender is the serializer class.
+exposure_checked = Signal()
+
+# Sent once `ConfidentialFieldsPermission` ran a check, with the
+# `request`, `view`, the permission `method` that ran, whether it
+# `granted` access and the `duration` of the check in seconds. The
+# sender is the permission class.
+permission_checked = Signal()
+
+# Sent before `ConfidentialBulkMixin` updates rows without `save()`,
+# and thus without `pre_save`, with the `instances` to write, still
+# holding their previous values. The sender is the model.
+pre_bulk_save = Signal()
+
+# Sent once `ConfidentialBulkMixin` wrote rows without `save()`, and
+# thus without `post_save`, with the `instances` written and whether
+# they were `created`. The sender is the model.
+bulk_saved = Signal()
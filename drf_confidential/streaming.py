@@ -0,0 +1,30 @@
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _dumps(item):
+    return json.dumps(
+        item, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def stream_json_array(items):
+    """Encode the items as a JSON array, one item at a time."""
+    yield "["
+    for index, item in enumerate(items):
+        yield "," + _dumps(item) if index else _dumps(item)
+    yield "]"
+
+
+def stream_json_lines(items):
+    """Encode the items as JSON Lines, one item at a time."""
+    for item in items:
+        yield _dumps(item) + "\n"
+
+
+# Streaming formats by name, with their encoder and content type.
+stream_formats = {
+    "json": (stream_json_array, "application/json"),
+    "jsonl": (stream_json_lines, "application/x-ndjson"),
+}
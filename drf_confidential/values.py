@@ -0,0 +1,100 @@
+from collections import OrderedDict, namedtuple
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+
+from rest_framework.relations import PKOnlyObject, RelatedField
+
+from .decisions import exposure_annotation
+from .policy import get_policy
+from .queryset import annotate_exposure, get_uniform_decision
+
+# A readable field served from a `values()` column.
+#
+# `column` is the lookup selecting its value and `relation` whether
+# the value is the primary key of a related object, to be passed to
+# the field as a `PKOnlyObject`.
+ValueField = namedtuple("ValueField", ("name", "field", "column", "relation"))
+
+
+def _get_column(model, source_attrs):
+    """Return the column lookup of the source, if it names a column.
+
+    The source may follow forward single-valued relations, which
+    `values()` joins without multiplying the rows.
+    """
+    for index, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.many_to_many:
+            return None
+        if index < len(source_attrs) - 1:
+            if not field.is_relation:
+                return None
+            model = field.related_model
+    return "__".join(source_attrs) or None
+
+
+def get_value_fields(serializer):
+    """Plan how the serializer's readable fields are read from rows.
+
+    Raises `ImproperlyConfigured` for fields that need a model
+    instance, e.g. nested serializers, method fields or fields of
+    multi-valued relations.
+    """
+    model = get_policy(type(serializer)).model
+    value_fields = []
+    for field in serializer._readable_fields:
+        column = _get_column(model, field.source_attrs)
+        relation = isinstance(field, RelatedField)
+        if column is None or (
+            relation and not field.use_pk_only_optimization()
+        ):
+            raise ImproperlyConfigured(
+                "{} cannot be serialized from values: `{}` does not read "
+                "a column.".format(type(serializer).__name__, field.field_name)
+            )
+        value_fields.append(
+            ValueField(field.field_name, field, column, relation)
+        )
+    return value_fields
+
+
+def iter_values(serializer, queryset, chunk_size=2000):
+    """Yield the representation of the rows, read with `values()`.
+
+    No model instance is built: every readable field is read from its
+    column, related objects are represented from their primary key,
+    and the exposure of each row is selected along with it. The
+    columns of fields hidden from the user are not selected when no
+    row is exposed, and are dropped from the rows not exposed.
+    """
+    policy = get_policy(type(serializer))
+    user = getattr(serializer.context.get("request"), "user", None)
+    value_fields = get_value_fields(serializer)
+    hidden = policy.get_hidden_fields(user)
+    if get_uniform_decision(policy, user) is False:
+        value_fields = [vf for vf in value_fields if vf.name not in hidden]
+
+    if exposure_annotation not in queryset.query.annotations:
+        queryset = annotate_exposure(queryset, type(serializer), user)
+    rows = (
+        queryset.prefetch_related(None)
+        .values(*{vf.column for vf in value_fields}, exposure_annotation)
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        withheld = () if row[exposure_annotation] else hidden
+        ret = OrderedDict()
+        for name, field, column, relation in value_fields:
+            if name in withheld:
+                continue
+            value = row[column]
+            if value is None:
+                ret[name] = None
+            else:
+                ret[name] = field.to_representation(
+                    PKOnlyObject(pk=value) if relation else value
+                )
+        yield ret
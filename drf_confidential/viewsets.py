@@ -0,0 +1,429 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, models, router, transaction
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    APIException,
+    NotFound,
+    ValidationError,
+)
+from rest_framework.mixins import (
+    CreateModelMixin,
+    DestroyModelMixin,
+    UpdateModelMixin,
+)
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.serializers import (
+    ModelSerializer,
+    raise_errors_on_nested_writes,
+)
+
+from . import caching
+from .compat import can_return_bulk_pks
+from .decisions import decide_exposures, forget_exposure
+from .policy import get_policy
+from .queryset import annotate_exposure, defer_confidential
+from .related import select_exposure_related
+from .signals import bulk_saved, pre_bulk_save
+from .streaming import stream_formats
+
+
+class ConfidentialQuerysetMixin:
+    """Compute confidential exposure in the viewset's queryset.
+
+    Rows fetched for read-only requests are annotated with their
+    exposure flag, so that serializing a list does not issue any
+    per-row query to resolve ownership or the `user_relation` lookup.
+    The relations traversed by the remaining checks, e.g. those of
+    nested confidential serializers, are joined or prefetched, and the
+    confidential columns are deferred when no row can be exposed.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        # The flag could go stale if a write changes the relation to
+        # the user, so only annotate for reads.
+        annotate = self.request.method in SAFE_METHODS
+
+        queryset = select_exposure_related(
+            queryset, serializer_class, include_own=not annotate
+        )
+        if not annotate:
+            return queryset
+        user = getattr(self.request, "user", None)
+        queryset = annotate_exposure(queryset, serializer_class, user)
+        return defer_confidential(queryset, serializer_class, user)
+
+
+def _get_count(paginator):
+    """Return the total count of the paginated list, if known."""
+    page = getattr(paginator, "page", None)
+    if page is not None:
+        return page.paginator.count
+    return getattr(paginator, "count", None)
+
+
+class ConfidentialConditionalMixin:
+    """Answer conditional GETs of the list and detail actions.
+
+    Responses carry an ETag computed from the versions of the rows,
+    kept by the representation cache, and from the fields hidden from
+    the user in each row, so that users seeing different variants
+    never share a tag. A request whose `If-None-Match` matches is
+    answered with `304 Not Modified` before anything is serialized.
+    Put it after `ConfidentialStreamingMixin`, which streams lists
+    without tags.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Track the row versions from now on, in every process
+        # importing the view.
+        if getattr(cls, "serializer_class", None) is not None:
+            caching.register(cls.serializer_class)
+
+    def _get_conditional_response(self, request, instances, extra=()):
+        """Return the tag of the instances, and a 304 if it matches."""
+        etag = caching.get_etag(
+            self.get_serializer_class(), request, instances, extra
+        )
+        if etag is None:
+            return None, None
+        etags = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        etags = {tag[2:] if tag.startswith("W/") else tag for tag in etags}
+        if etag in etags or "*" in etags:
+            return etag, self._tag(Response(status=304), etag)
+        return etag, None
+
+    def _tag(self, response, etag):
+        if etag is not None:
+            response["ETag"] = etag
+            patch_vary_headers(response, ("Authorization", "Cookie"))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, response = self._get_conditional_response(request, [instance])
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instance)
+        return self._tag(Response(serializer.data), etag)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        instances = list(queryset) if page is None else page
+        etag, response = self._get_conditional_response(
+            request, instances, ("list", _get_count(self.paginator))
+        )
+        if response is not None:
+            return response
+        serializer = self.get_serializer(instances, many=True)
+        if page is None:
+            response = Response(serializer.data)
+        else:
+            response = self.get_paginated_response(serializer.data)
+        return self._tag(response, etag)
+
+
+class ConfidentialStreamingMixin:
+    """Stream the list action on request, e.g. for large exports.
+
+    With `?stream=json` the list is written as a JSON array, with
+    `?stream=jsonl` as JSON Lines. Rows are fetched, decided and
+    serialized `stream_chunk_size` at a time, so that memory stays
+    flat however many rows there are. Streamed lists are not
+    paginated.
+
+    With `stream_from_values`, rows are read with `values()` instead
+    of as model instances, which the serializer must support.
+    """
+
+    stream_param = "stream"
+    stream_chunk_size = 2000
+    stream_from_values = False
+
+    def list(self, request, *args, **kwargs):
+        stream_format = request.query_params.get(self.stream_param)
+        if stream_format is None:
+            return super().list(request, *args, **kwargs)
+        try:
+            encode, content_type = stream_formats[stream_format]
+        except KeyError:
+            raise ValidationError(
+                {
+                    self.stream_param: "Expected one of: {}.".format(
+                        ", ".join(sorted(stream_formats))
+                    )
+                }
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(queryset, many=True)
+        if self.stream_from_values:
+            items = serializer.iter_values(
+                queryset, chunk_size=self.stream_chunk_size
+            )
+        else:
+            items = serializer.iter_representation(
+                queryset, chunk_size=self.stream_chunk_size
+            )
+        return StreamingHttpResponse(encode(items), content_type=content_type)
+
+
+def _overrides(model, name):
+    """Return whether the model overrides the `Model` method."""
+    return getattr(model, name) is not getattr(models.Model, name)
+
+
+def _failure(status_code, errors):
+    return {"status": status_code, "errors": errors}
+
+
+def _bulk_response(results):
+    """Answer with the uniform status of the items, or Multi-Status."""
+    statuses = {result["status"] for result in results}
+    if len(statuses) > 1:
+        return Response(results, status=status.HTTP_207_MULTI_STATUS)
+    (status_code,) = statuses
+    if status_code == status.HTTP_204_NO_CONTENT:
+        return Response(status=status_code)
+    return Response(results, status=status_code)
+
+
+class ConfidentialBulkMixin:
+    """Create, update and delete many records in one request.
+
+    `POST`, `PATCH` and `DELETE` on the `bulk/` route of the list take
+    a list of items: the records to create, partial updates carrying
+    their primary key, or the primary keys to delete. The targets of
+    updates and deletes are fetched together and their exposure is
+    decided in a single query, before the object permissions run per
+    item. Every item is answered with its own status and data or
+    errors, the response being `207 Multi-Status` when they differ.
+
+    Valid items are written with `bulk_create`/`bulk_update` when
+    neither the serializer nor the viewset customizes creating or
+    updating, and saved one by one otherwise.
+    """
+
+    bulk_max_items = 1000
+
+    def _get_bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError("Expected a non-empty list of items.")
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                "Expected at most {} items.".format(self.bulk_max_items)
+            )
+        return items
+
+    def _get_bulk_targets(self, request, policy, pks, results):
+        """Fetch and authorize the targets of the items, by index.
+
+        Items whose target is malformed, missing or forbidden are
+        answered in `results`.
+        """
+        pk_field = policy.model._meta.pk
+        parsed = {}
+        for index, pk in pks.items():
+            try:
+                parsed[index] = pk_field.to_python(pk)
+            except DjangoValidationError as exc:
+                results[index] = _failure(
+                    status.HTTP_400_BAD_REQUEST, {pk_field.name: exc.messages}
+                )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        instances = {
+            obj.pk: obj for obj in queryset.filter(pk__in=set(parsed.values()))
+        }
+        decide_exposures(policy, request, instances.values())
+
+        targets = {}
+        for index, pk in parsed.items():
+            instance = instances.get(pk)
+            try:
+                if instance is None:
+                    raise NotFound()
+                self.check_object_permissions(request, instance)
+            except APIException as exc:
+                results[index] = _failure(
+                    exc.status_code, {"detail": exc.detail}
+                )
+            else:
+                targets[index] = instance
+        return targets
+
+    def _can_bulk_write(self, policy, serializers, created):
+        """Return whether the serializers' data can be written in bulk."""
+        name = "create" if created else "update"
+        base = CreateModelMixin if created else UpdateModelMixin
+        perform = "perform_" + name
+        if getattr(type(self), perform) is not getattr(base, perform):
+            return False
+        if getattr(type(serializers[0]), name) is not getattr(
+            ModelSerializer, name
+        ):
+            return False
+        # Bulk writes would bypass the model's own saving logic.
+        if _overrides(policy.model, "save"):
+            return False
+
+        opts = policy.model._meta
+        if created:
+            connection = connections[router.db_for_write(policy.model)]
+            if opts.parents or not can_return_bulk_pks(connection):
+                return False
+        concrete = {
+            field.name
+            for field in opts.concrete_fields
+            if not field.primary_key
+        }
+        for serializer in serializers:
+            raise_errors_on_nested_writes(
+                name, serializer, serializer.validated_data
+            )
+            if not set(serializer.validated_data) <= concrete:
+                return False
+        return True
+
+    def _bulk_save(self, policy, serializers, created):
+        manager = policy.model._default_manager
+        if created:
+            instances = manager.bulk_create(
+                [
+                    policy.model(**serializer.validated_data)
+                    for serializer in serializers
+                ]
+            )
+        else:
+            pre_bulk_save.send(
+                sender=policy.model,
+                instances=[serializer.instance for serializer in serializers],
+            )
+            fields = set()
+            for serializer in serializers:
+                for attr, value in serializer.validated_data.items():
+                    setattr(serializer.instance, attr, value)
+                fields.update(serializer.validated_data)
+            instances = [serializer.instance for serializer in serializers]
+            if fields:
+                manager.bulk_update(instances, fields)
+
+        for serializer, instance in zip(serializers, instances):
+            serializer.instance = instance
+            forget_exposure(self.request, instance)
+        bulk_saved.send(
+            sender=policy.model, instances=instances, created=created
+        )
+
+    def _bulk_write(self, policy, serializers, created):
+        """Write the valid items, then decide their exposure at once."""
+        if not serializers:
+            return
+        with transaction.atomic(using=router.db_for_write(policy.model)):
+            if self._can_bulk_write(policy, serializers, created):
+                self._bulk_save(policy, serializers, created)
+            else:
+                perform = (
+                    self.perform_create if created else self.perform_update
+                )
+                for serializer in serializers:
+                    perform(serializer)
+        decide_exposures(
+            policy,
+            self.request,
+            [serializer.instance for serializer in serializers],
+        )
+
+    def _bulk_respond(self, results, serializers, status_code):
+        for index, serializer in serializers.items():
+            results[index] = {"status": status_code, "data": serializer.data}
+        return _bulk_response(results)
+
+    @action(detail=False, methods=["post"], url_path="bulk", url_name="bulk")
+    def bulk_create(self, request, *args, **kwargs):
+        items = self._get_bulk_items(request)
+        policy = get_policy(self.get_serializer_class())
+        results = [None] * len(items)
+        serializers = {}
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                serializers[index] = serializer
+            else:
+                results[index] = _failure(
+                    status.HTTP_400_BAD_REQUEST, serializer.errors
+                )
+
+        self._bulk_write(policy, list(serializers.values()), created=True)
+        return self._bulk_respond(
+            results, serializers, status.HTTP_201_CREATED
+        )
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        items = self._get_bulk_items(request)
+        policy = get_policy(self.get_serializer_class())
+        pk_name = policy.model._meta.pk.name
+        results = [None] * len(items)
+        pks = {}
+        for index, item in enumerate(items):
+            if isinstance(item, dict) and pk_name in item:
+                pks[index] = item[pk_name]
+            else:
+                results[index] = _failure(
+                    status.HTTP_400_BAD_REQUEST,
+                    {pk_name: ["This field is required."]},
+                )
+
+        serializers = {}
+        targets = self._get_bulk_targets(request, policy, pks, results)
+        for index, instance in targets.items():
+            serializer = self.get_serializer(
+                instance, data=items[index], partial=True
+            )
+            if serializer.is_valid():
+                serializers[index] = serializer
+            else:
+                results[index] = _failure(
+                    status.HTTP_400_BAD_REQUEST, serializer.errors
+                )
+
+        self._bulk_write(policy, list(serializers.values()), created=False)
+        return self._bulk_respond(results, serializers, status.HTTP_200_OK)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        items = self._get_bulk_items(request)
+        policy = get_policy(self.get_serializer_class())
+        results = [None] * len(items)
+        targets = self._get_bulk_targets(
+            request, policy, dict(enumerate(items)), results
+        )
+
+        # Items naming the same record delete it once.
+        instances = {instance.pk: instance for instance in targets.values()}
+        if instances:
+            with transaction.atomic(using=router.db_for_write(policy.model)):
+                if type(
+                    self
+                ).perform_destroy is DestroyModelMixin.perform_destroy and not _overrides(
+                    policy.model, "delete"
+                ):
+                    policy.model._default_manager.filter(
+                        pk__in=list(instances)
+                    ).delete()
+                else:
+                    for instance in instances.values():
+                        self.perform_destroy(instance)
+        for index in targets:
+            results[index] = {"status": status.HTTP_204_NO_CONTENT}
+        return _bulk_response(results)
@@ -0,0 +1,24 @@
+from django.utils.crypto import get_random_string
+
+from tests.testapp.models import Employee, EmployeeJob
+
+
+def create_employee(**fields):
+    """Create an employee with random values for its required fields."""
+    values = {
+        "first_name": get_random_string(length=5),
+        "last_name": get_random_string(length=5),
+        "address_1": get_random_string(length=16),
+        "country": get_random_string(length=16),
+        "city": get_random_string(length=16),
+        "phone_number": get_random_string(length=16),
+    }
+    values.update(fields)
+    return Employee.objects.create(**values)
+
+
+def create_job(salary=10000):
+    """Create a job held by a new employee."""
+    return EmployeeJob.objects.create(
+        employee=create_employee(), job_title="dev", salary=salary
+    )
@@ -24,6 +24,10 @@ ROOT_URLCONF = "tests.testapp.urls"
 
 AUTH_USER_MODEL = "testapp.Profile"
 
+CONFIDENTIAL_OBJECT_PERMISSION_BACKEND = (
+    "drf_confidential.backends.ObjectGrantBackend"
+)
+
 REST_FRAMEWORK = {
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
 }
@@ -34,3 +38,6 @@ DATABASES = {
         "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
     },
 }
+
+# The test app runs in a single process.
+SILENCED_SYSTEM_CHECKS = ["drf_confidential.W001"]
@@ -0,0 +1,134 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential import access, reasons
+from drf_confidential.access import track
+from drf_confidential.decisions import acheck_exposures
+from drf_confidential.models import AccessEntry
+from drf_confidential.policy import ConfidentialPolicy
+from drf_confidential.signals import bulk_saved, pre_bulk_save
+from tests.factories import create_job
+from tests.test_async import run_outside_loop
+from tests.testapp.models import EmployeeJob
+from tests.testapp.serializers import EmployeeJobSerializer
+
+_USER_MODEL = get_user_model()
+
+
+class AccessIndexTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with mock.patch("drf_confidential.policy.use_access_index", True):
+            cls.policy = ConfidentialPolicy(EmployeeJobSerializer)
+        track(cls.policy)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # Stop maintaining the index for the rest of the test run.
+        for model in access._tracked:
+            for signal in (
+                pre_save,
+                post_save,
+                pre_delete,
+                post_delete,
+                pre_bulk_save,
+                bulk_saved,
+            ):
+                signal.disconnect(
+                    sender=model, dispatch_uid=access.dispatch_uid
+                )
+        access._paths.clear()
+        access._tracked.clear()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.job1 = create_job()
+        cls.job2 = create_job()
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1",
+            password="Test!@#$5",
+            employee_profile=cls.job1.employee,
+        )
+
+    def _get_user(self):
+        user = _USER_MODEL.objects.get(pk=self.user.pk)
+        self.policy.has_permission(user)  # load the permissions
+        return user
+
+    def _get_linked(self):
+        return set(
+            EmployeeJob.objects.filter(
+                self.policy.get_access_q(self._get_user())
+            ).values_list("pk", flat=True)
+        )
+
+    def test_deep_path_is_indexed(self):
+        self.assertEqual(self.policy.indexed, self.policy.relations)
+
+    def test_link_is_a_single_lookup(self):
+        user = self._get_user()
+        job = EmployeeJob.objects.get(pk=self.job1.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.policy.get_link(job, user), reasons.RELATION)
+        job = EmployeeJob.objects.get(pk=self.job2.pk)
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.policy.get_link(job, user))
+        self.assertEqual(self._get_linked(), {self.job1.pk})
+
+    def test_async_lookups_run_outside_the_loop(self):
+        user = self._get_user()
+        job = EmployeeJob.objects.get(pk=self.job1.pk)
+        self.assertEqual(
+            run_outside_loop(self, self.policy.aget_link, job, user),
+            reasons.RELATION,
+        )
+        request = APIRequestFactory().get("/")
+        request.user = user
+        self.assertEqual(
+            run_outside_loop(
+                self,
+                acheck_exposures,
+                self.policy,
+                request,
+                list(EmployeeJob.objects.order_by("pk")),
+            ),
+            [True, False],
+        )
+
+    def test_relinking_refreshes_entries(self):
+        self.user.employee_profile = self.job2.employee
+        self.user.save()
+        self.assertEqual(self._get_linked(), {self.job2.pk})
+
+        self.job2.employee.delete()
+        self.assertEqual(self._get_linked(), set())
+
+    def test_bulk_relinking_refreshes_entries(self):
+        users = [self._get_user()]
+        pre_bulk_save.send(sender=_USER_MODEL, instances=users)
+        users[0].employee_profile = self.job2.employee
+        _USER_MODEL.objects.bulk_update(users, ["employee_profile"])
+        bulk_saved.send(sender=_USER_MODEL, instances=users, created=False)
+        self.assertEqual(self._get_linked(), {self.job2.pk})
+
+    def test_rebuild(self):
+        AccessEntry.objects.all().delete()
+        self.assertEqual(self._get_linked(), set())
+        with mock.patch("drf_confidential.policy.use_access_index", True):
+            call_command(
+                "rebuild_confidential_access_index", stdout=StringIO()
+            )
+        self.assertEqual(self._get_linked(), {self.job1.pk})
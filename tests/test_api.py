@@ -840,3 +840,22 @@ class PostAPITest(APITestCase):
         self.assertTrue(status.is_success(response.status_code))
         self.assertIn("secret_note", response.data.keys())
         self.assertEqual(response.data["secret_note"], self.post1.secret_note)
+
+    def test_owner_can_update_post(self):
+        self.client.force_authenticate(user=self.user1)
+
+        response = self.client.patch(
+            reverse(self.detail_name, kwargs={"pk": self.post1.pk}),
+            {"post_title": "updated"},
+        )
+        self.assertTrue(status.is_success(response.status_code))
+        self.assertIn("secret_note", response.data.keys())
+
+    def test_non_owner_cannot_update_post(self):
+        self.client.force_authenticate(user=self.user1)
+
+        response = self.client.patch(
+            reverse(self.detail_name, kwargs={"pk": self.post2.pk}),
+            {"post_title": "updated"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,149 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase, override_settings
+
+from rest_framework.routers import SimpleRouter
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential.decisions import acheck_exposure, acheck_exposures
+from drf_confidential.permissions import (
+    AsyncConfidentialFieldsPermission,
+    check_async_permissions,
+)
+from drf_confidential.policy import get_policy
+from tests.factories import create_job
+from tests.testapp.models import EmployeeJob, Post
+from tests.testapp.serializers import EmployeeJobSerializer, PostSerializer
+from tests.test_permissions import SerializerlessPostViewSet
+
+_USER_MODEL = get_user_model()
+
+
+class SyncPostViewSet(SerializerlessPostViewSet):
+    permission_classes = (AsyncConfidentialFieldsPermission,)
+
+
+_router = SimpleRouter()
+_router.register(r"posts", SyncPostViewSet, basename="post")
+urlpatterns = _router.urls
+
+
+def run_outside_loop(test, func, *args):
+    """Await the function and assert that no query ran inside the loop."""
+    execute = CursorWrapper.execute
+    in_loop = []
+
+    def wrapper(cursor, sql, *params):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            in_loop.append(sql)
+        return execute(cursor, sql, *params)
+
+    ContentType.objects.clear_cache()
+    with mock.patch.object(CursorWrapper, "execute", wrapper):
+        result = async_to_sync(func)(*args)
+    test.assertEqual(in_loop, [])
+    return result
+
+
+class AsyncExposureTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.job = create_job(10000)
+        cls.other_job = create_job(20000)
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1",
+            password="Test!@#$5",
+            employee_profile=cls.job.employee,
+        )
+        cls.post = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.user,
+        )
+        cls.policy = get_policy(EmployeeJobSerializer)
+
+    def _request(self, method="get"):
+        request = getattr(APIRequestFactory(), method)("/")
+        request.user = _USER_MODEL.objects.get(pk=self.user.pk)
+        request.user.get_all_permissions()  # warm the permission cache
+        return request
+
+    def _jobs(self):
+        return list(EmployeeJob.objects.order_by("pk"))
+
+    def test_matches_sync_decision(self):
+        request = self._request()
+        job, other_job = self._jobs()
+        self.assertTrue(
+            async_to_sync(acheck_exposure)(self.policy, request, job)
+        )
+        self.assertFalse(
+            async_to_sync(acheck_exposure)(self.policy, request, other_job)
+        )
+
+    def test_ownership_is_read_from_the_instance(self):
+        request = self._request()
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                async_to_sync(acheck_exposure)(
+                    get_policy(PostSerializer), request, self.post
+                )
+            )
+
+    def test_many_instances_are_decided_in_one_query(self):
+        request = self._request()
+        jobs = self._jobs()
+        with self.assertNumQueries(1):
+            decisions = async_to_sync(acheck_exposures)(
+                self.policy, request, jobs
+            )
+        self.assertEqual(decisions, [True, False])
+
+    def test_grants_are_looked_up_outside_the_loop(self):
+        request = self._request()
+        job, other_job = self._jobs()
+        self.assertFalse(
+            run_outside_loop(
+                self, acheck_exposure, self.policy, request, other_job
+            )
+        )
+        request = self._request()
+        self.assertEqual(
+            run_outside_loop(
+                self, acheck_exposures, self.policy, request, [other_job]
+            ),
+            [False],
+        )
+
+    def test_permission(self):
+        permission = AsyncConfidentialFieldsPermission()
+
+        def check(action):
+            request = self._request("patch")
+            view = SerializerlessPostViewSet(action=action, request=request)
+            return async_to_sync(permission.has_permission)(
+                request, view
+            ) and async_to_sync(permission.has_object_permission)(
+                request, view, self.post
+            )
+
+        self.assertTrue(check("partial_update"))
+        self.assertTrue(check("destroy"))
+        self.assertFalse(check("create"))
+
+    def test_sync_views_are_reported(self):
+        self.assertEqual(check_async_permissions(), [])
+        with override_settings(ROOT_URLCONF=__name__):
+            (error,) = check_async_permissions()
+        self.assertEqual(error.id, "drf_confidential.E001")
+        self.assertIs(error.obj, SyncPostViewSet)
@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from drf_confidential import reasons
+from drf_confidential.backends import ObjectGrantBackend
+from drf_confidential.models import ObjectGrant
+from drf_confidential.policy import get_policy
+from drf_confidential.queryset import filter_exposure
+from tests.factories import create_employee
+from tests.testapp.models import Employee
+from tests.testapp.serializers import EmployeeSerializer
+
+_USER_MODEL = get_user_model()
+
+
+def _grant(user, codename, obj):
+    return ObjectGrant.objects.create(
+        user=user,
+        permission=Permission.objects.get(codename=codename),
+        content_type=ContentType.objects.get_for_model(obj),
+        object_pk=str(obj.pk),
+    )
+
+
+class ObjectGrantBackendTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.employees = [create_employee() for _ in range(3)]
+        _grant(cls.user, "view_sensitive_employee", cls.employees[0])
+        _grant(cls.user, "view_sensitive_employee", cls.employees[1])
+        _grant(cls.user, "view_sensitive_profile", cls.employees[1])
+
+    def _granted(self, *permissions):
+        return set(
+            ObjectGrantBackend().get_granted_queryset(
+                self.user, Employee, permissions
+            )
+        )
+
+    def test_grants_are_selected_by_permission(self):
+        self.assertEqual(
+            self._granted("testapp.view_sensitive_employee"),
+            {self.employees[0].pk, self.employees[1].pk},
+        )
+        self.assertEqual(self._granted("testapp.view_employee_salary"), set())
+
+    def test_every_permission_must_be_granted(self):
+        self.assertEqual(
+            self._granted(
+                "testapp.view_sensitive_employee",
+                "testapp.view_sensitive_profile",
+            ),
+            {self.employees[1].pk},
+        )
+
+    def test_granted_instance_is_explained(self):
+        policy = get_policy(EmployeeSerializer)
+        self.assertEqual(
+            policy.explain(self.employees[0], self.user), reasons.GRANT
+        )
+        self.assertIsNone(policy.explain(self.employees[2], self.user))
+
+    def test_granted_rows_are_filtered(self):
+        queryset = filter_exposure(
+            Employee.objects.all(), EmployeeSerializer, self.user
+        )
+        self.assertEqual(
+            set(queryset.values_list("pk", flat=True)),
+            {self.employees[0].pk, self.employees[1].pk},
+        )
+
+
+class ObjectGrantListTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.granted = _USER_MODEL.objects.create_user(
+            username="testuser2",
+            password="Test!@#$5",
+            employee_profile=create_employee(),
+        )
+        _grant(
+            cls.user, "view_sensitive_employee", cls.granted.employee_profile
+        )
+        _grant(cls.user, "view_sensitive_profile", cls.granted)
+
+    def _list(self, endpoint):
+        user = _USER_MODEL.objects.get(pk=self.user.pk)
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(endpoint + "-list"))
+        return response.data, len(context.captured_queries)
+
+    def test_only_granted_rows_are_exposed(self):
+        create_employee()
+        data, _ = self._list("employee")
+        self.assertEqual(
+            [item["id"] for item in data if "address_1" in item],
+            [self.granted.employee_profile_id],
+        )
+
+    def test_nested_grants_are_decided_per_page(self):
+        data, baseline = self._list("profile")
+        exposed = [
+            item["id"]
+            for item in data
+            if item["employee_profile"] and "city" in item["employee_profile"]
+        ]
+        self.assertEqual(exposed, [self.granted.pk])
+
+        for index in range(5):
+            _USER_MODEL.objects.create_user(
+                username="user{}".format(index),
+                password="Test!@#$5",
+                employee_profile=create_employee(),
+            )
+        _, num_queries = self._list("profile")
+        self.assertEqual(num_queries, baseline)
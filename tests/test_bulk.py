@@ -0,0 +1,181 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.db import connection, models
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from drf_confidential.signals import bulk_saved
+from tests.testapp.models import Post
+
+_USER_MODEL = get_user_model()
+
+
+class BulkActionTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.other = _USER_MODEL.objects.create_user(
+            username="testuser2", password="Test!@#$5"
+        )
+        cls.own_posts = [
+            Post.objects.create(
+                post_title=str(index),
+                post_content="b",
+                secret_note="c",
+                created_by=cls.user,
+            )
+            for index in range(5)
+        ]
+        cls.other_post = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.other,
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("post-bulk")
+
+    def _patch(self, posts):
+        return self.client.patch(
+            self.url,
+            [{"id": post.pk, "post_title": "new"} for post in posts],
+            format="json",
+        )
+
+    def test_update_reports_per_item_failures(self):
+        response = self.client.patch(
+            self.url,
+            [
+                {"id": self.own_posts[0].pk, "post_title": "new"},
+                {"id": self.other_post.pk, "post_title": "new"},
+                {"id": 0, "post_title": "new"},
+                {"id": "x"},
+                {"post_title": "new"},
+                {"id": self.own_posts[1].pk, "post_title": ""},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [item["status"] for item in response.data],
+            [200, 403, 404, 400, 400, 400],
+        )
+        self.assertEqual(response.data[0]["data"]["post_title"], "new")
+        self.assertEqual(response.data[0]["data"]["secret_note"], "c")
+        self.assertIn("post_title", response.data[5]["errors"])
+        self.assertEqual(
+            list(
+                Post.objects.filter(post_title="new").values_list(
+                    "pk", flat=True
+                )
+            ),
+            [self.own_posts[0].pk],
+        )
+
+    def test_update_writes_in_bulk(self):
+        received = []
+
+        def receiver(sender, instances, created, **kwargs):
+            received.append((sender, len(instances), created))
+
+        bulk_saved.connect(receiver)
+        self.addCleanup(bulk_saved.disconnect, receiver)
+        response = self._patch(self.own_posts)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(received, [(Post, 5, False)])
+        self.assertEqual(
+            Post.objects.filter(post_title="new").count(), len(self.own_posts)
+        )
+
+    def test_update_queries_do_not_grow_with_items(self):
+        counts = []
+        for size in (1, len(self.own_posts)):
+            self.client.force_authenticate(
+                user=_USER_MODEL.objects.get(pk=self.user.pk)
+            )
+            with CaptureQueriesContext(connection) as context:
+                response = self._patch(self.own_posts[:size])
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(context.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_model_save_and_delete_overrides_are_honoured(self):
+        called = []
+
+        def save(instance, *args, **kwargs):
+            called.append(("save", instance.pk))
+            models.Model.save(instance, *args, **kwargs)
+
+        def delete(instance, *args, **kwargs):
+            called.append(("delete", instance.pk))
+            return models.Model.delete(instance, *args, **kwargs)
+
+        posts = self.own_posts[:2]
+        with mock.patch.object(Post, "save", save):
+            self.assertEqual(self._patch(posts).status_code, 200)
+        with mock.patch.object(Post, "delete", delete):
+            response = self.client.delete(
+                self.url, [post.pk for post in posts], format="json"
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            called,
+            [("save", post.pk) for post in posts]
+            + [("delete", post.pk) for post in posts],
+        )
+
+    def test_create_requires_permission(self):
+        data = [
+            {
+                "post_title": "a",
+                "post_content": "b",
+                "secret_note": "c",
+                "created_by": self.user.pk,
+            }
+        ]
+        response = self.client.post(self.url, data, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.user.user_permissions.add(
+            Permission.objects.get(codename="view_sensitive_post")
+        )
+        self.client.force_authenticate(
+            user=_USER_MODEL.objects.get(pk=self.user.pk)
+        )
+        response = self.client.post(
+            self.url, data + [{"post_title": "a"}], format="json"
+        )
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [item["status"] for item in response.data], [201, 400]
+        )
+        self.assertTrue(
+            Post.objects.filter(pk=response.data[0]["data"]["id"]).exists()
+        )
+
+    def test_destroy(self):
+        pks = [self.own_posts[0].pk, self.own_posts[0].pk, self.other_post.pk]
+        response = self.client.delete(self.url, pks, format="json")
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(
+            [item["status"] for item in response.data], [204, 204, 403]
+        )
+        self.assertFalse(Post.objects.filter(pk=pks[0]).exists())
+        self.assertTrue(Post.objects.filter(pk=pks[2]).exists())
+
+        response = self.client.delete(
+            self.url, [self.own_posts[1].pk], format="json"
+        )
+        self.assertEqual(response.status_code, 204)
+
+    def test_rejects_non_list(self):
+        response = self.client.patch(self.url, {"id": 1}, format="json")
+        self.assertEqual(response.status_code, 400)
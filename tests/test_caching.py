@@ -0,0 +1,153 @@
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential.caching import ConfidentialCacheMixin, get_plan
+from drf_confidential.policy import get_policy
+from tests.factories import create_employee
+from tests.testapp.models import Employee, EmployeeJob, Profile
+from tests.testapp.serializers import (
+    EmployeeJobSerializer,
+    EmployeeSerializer,
+    ProfileSerializer,
+)
+
+_USER_MODEL = get_user_model()
+
+
+class CachedJobSerializer(ConfidentialCacheMixin, EmployeeJobSerializer):
+    evaluations = serializers.SerializerMethodField()
+
+    def get_evaluations(self, obj):
+        self.context["evaluated"].append(obj.pk)
+        return None
+
+
+class CachedProfileSerializer(ConfidentialCacheMixin, ProfileSerializer):
+    evaluations = serializers.SerializerMethodField()
+
+    def get_evaluations(self, obj):
+        self.context["evaluated"].append(obj.pk)
+        return None
+
+
+class CachePlanTest(TestCase):
+    def test_nested_serializers_are_planned(self):
+        plan = get_plan(CachedProfileSerializer)
+        self.assertIs(plan.model, Profile)
+        self.assertEqual(plan.nested_models, (Employee,))
+        self.assertEqual(
+            plan.nested_policies, (get_policy(EmployeeSerializer),)
+        )
+
+    def test_plans_are_registered_on_startup(self):
+        with mock.patch(
+            "drf_confidential.apps.autodiscover_modules"
+        ) as autodiscover:
+            apps.get_app_config("drf_confidential").ready()
+        autodiscover.assert_called_once_with("serializers", "views")
+
+
+class ConfidentialCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee()
+        cls.job = EmployeeJob.objects.create(
+            employee=cls.employee, job_title="dev", salary=10000
+        )
+        cls.linked = _USER_MODEL.objects.create_user(
+            username="linked",
+            password="Test!@#$5",
+            employee_profile=cls.employee,
+        )
+        cls.unprivileged = _USER_MODEL.objects.create_user(
+            username="unprivileged", password="Test!@#$5"
+        )
+        cls.privileged = _USER_MODEL.objects.create_user(
+            username="privileged", password="Test!@#$5"
+        )
+        cls.privileged.user_permissions.add(
+            *Permission.objects.filter(codename__startswith="view_sensitive")
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.evaluated = []
+
+    def _serialize(self, serializer_class, instance, user):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=user.pk)
+        context = {"request": request, "evaluated": self.evaluated}
+        return serializer_class(instance, context=context).data
+
+    def _job(self):
+        return EmployeeJob.objects.get(pk=self.job.pk)
+
+    def test_both_variants_are_cached(self):
+        for _ in range(2):
+            full = self._serialize(
+                CachedJobSerializer, self._job(), self.linked
+            )
+            redacted = self._serialize(
+                CachedJobSerializer, self._job(), self.unprivileged
+            )
+        self.assertEqual(self.evaluated, [self.job.pk, self.job.pk])
+        self.assertIn("salary", full)
+        self.assertNotIn("salary", redacted)
+        uncached = self._serialize(
+            EmployeeJobSerializer, self._job(), self.linked
+        )
+        self.assertEqual(dict(full), dict(uncached, evaluations=None))
+
+    def test_saving_the_row_invalidates(self):
+        self._serialize(CachedJobSerializer, self._job(), self.linked)
+        job = self._job()
+        job.salary = 20000
+        job.save()
+        data = self._serialize(CachedJobSerializer, self._job(), self.linked)
+        self.assertEqual(data["salary"], 20000)
+        self.assertEqual(len(self.evaluated), 2)
+
+    def test_saving_a_nested_row_invalidates(self):
+        profile = Profile.objects.get(pk=self.linked.pk)
+        self._serialize(CachedProfileSerializer, profile, self.privileged)
+        self._serialize(CachedProfileSerializer, profile, self.privileged)
+        self.assertEqual(len(self.evaluated), 1)
+
+        self.employee.city = "elsewhere"
+        self.employee.save()
+        profile = Profile.objects.get(pk=self.linked.pk)
+        data = self._serialize(
+            CachedProfileSerializer, profile, self.privileged
+        )
+        self.assertEqual(data["employee_profile"]["city"], "elsewhere")
+        self.assertEqual(len(self.evaluated), 2)
+
+    def test_row_dependent_nested_decisions_are_not_cached(self):
+        profile = Profile.objects.get(pk=self.linked.pk)
+        self._serialize(CachedProfileSerializer, profile, self.unprivileged)
+        self._serialize(CachedProfileSerializer, profile, self.unprivileged)
+        self.assertEqual(len(self.evaluated), 2)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            }
+        }
+    )
+    def test_caches_storing_nothing(self):
+        for _ in range(2):
+            data = self._serialize(
+                CachedJobSerializer, self._job(), self.linked
+            )
+        self.assertEqual(data["salary"], 10000)
+        self.assertEqual(len(self.evaluated), 2)
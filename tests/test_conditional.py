@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from drf_confidential.caching import check_cache_backend
+from tests.factories import create_employee
+
+_USER_MODEL = get_user_model()
+
+
+class ConditionalGetTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee()
+        cls.linked = _USER_MODEL.objects.create_user(
+            username="linked",
+            password="Test!@#$5",
+            employee_profile=cls.employee,
+        )
+        cls.unprivileged = _USER_MODEL.objects.create_user(
+            username="unprivileged", password="Test!@#$5"
+        )
+        cls.privileged = _USER_MODEL.objects.create_user(
+            username="privileged", password="Test!@#$5"
+        )
+        cls.privileged.user_permissions.add(
+            *Permission.objects.filter(codename__startswith="view_sensitive")
+        )
+        create_employee()
+
+    def setUp(self):
+        cache.clear()
+        self.detail_url = reverse("employee-detail", args=[self.employee.pk])
+
+    def _get(self, url, user, etag=None):
+        self.client.force_authenticate(
+            user=_USER_MODEL.objects.get(pk=user.pk)
+        )
+        if etag is None:
+            return self.client.get(url)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_matching_detail_is_not_modified(self):
+        response = self._get(self.detail_url, self.linked)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        response = self._get(self.detail_url, self.linked, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse(response.content)
+
+    def test_variants_have_their_own_tags(self):
+        etags = {
+            user.username: self._get(self.detail_url, user)["ETag"]
+            for user in (self.linked, self.unprivileged, self.privileged)
+        }
+        # The linked and the privileged user both see the full row.
+        self.assertEqual(etags["linked"], etags["privileged"])
+        self.assertNotEqual(etags["unprivileged"], etags["privileged"])
+        response = self._get(
+            self.detail_url, self.unprivileged, etags["privileged"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("address_1", response.data)
+
+    def test_saving_the_row_changes_the_tag(self):
+        etag = self._get(self.detail_url, self.linked)["ETag"]
+        self.employee.city = "elsewhere"
+        self.employee.save()
+        response = self._get(self.detail_url, self.linked, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["city"], "elsewhere")
+
+    def test_list(self):
+        url = reverse("employee-list")
+        etag = self._get(url, self.linked)["ETag"]
+        self.assertEqual(self._get(url, self.linked, etag).status_code, 304)
+        self.assertNotEqual(self._get(url, self.unprivileged)["ETag"], etag)
+
+        create_employee()
+        response = self._get(url, self.linked, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            }
+        }
+    )
+    def test_caches_storing_nothing_never_match(self):
+        response = self._get(self.detail_url, self.linked)
+        self.assertEqual(response.status_code, 200)
+        response = self._get(self.detail_url, self.linked, response["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_per_process_caches_are_reported(self):
+        (warning,) = check_cache_backend()
+        self.assertEqual(warning.id, "drf_confidential.W001")
+        with override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                    "LOCATION": "cache",
+                }
+            }
+        ):
+            self.assertEqual(check_cache_backend(), [])
@@ -0,0 +1,75 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential.decisions import check_exposure, forget_exposure
+from drf_confidential.policy import get_policy
+from tests.factories import create_employee
+from tests.testapp.models import Employee
+from tests.testapp.serializers import EmployeeSerializer
+
+_USER_MODEL = get_user_model()
+
+
+class CheckExposureTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.superuser = _USER_MODEL.objects.create_superuser(
+            username="admin", email="admin@domain.com", password="Test!@#$5"
+        )
+        cls.employee = create_employee()
+        cls.user.employee_profile = cls.employee
+        cls.user.save()
+        cls.policy = get_policy(EmployeeSerializer)
+
+    def _request(self, user):
+        request = APIRequestFactory().get("/")
+        request.user = user
+        return request
+
+    def _employee(self):
+        return Employee.objects.get(pk=self.employee.pk)
+
+    def test_decision_is_memoized_per_request(self):
+        user = _USER_MODEL.objects.get(pk=self.user.pk)
+        user.get_all_permissions()  # warm the permission cache
+        request = self._request(user)
+        employees = [self._employee() for _ in range(3)]
+
+        with self.assertNumQueries(1):
+            self.assertTrue(check_exposure(self.policy, request, employees[0]))
+        with self.assertNumQueries(0):
+            self.assertTrue(check_exposure(self.policy, request, employees[1]))
+
+        # a new request decides again
+        with self.assertNumQueries(1):
+            self.assertTrue(
+                check_exposure(self.policy, self._request(user), employees[2])
+            )
+
+    def test_forget_exposure(self):
+        request = self._request(self.user)
+        employee = self._employee()
+        check_exposure(self.policy, request, employee)
+        forget_exposure(request, employee)
+        self.assertEqual(request._confidential_decisions, {})
+
+    def test_fast_paths_do_not_query(self):
+        employee = self._employee()
+        with self.assertNumQueries(0):
+            self.assertFalse(
+                check_exposure(
+                    self.policy, self._request(AnonymousUser()), employee
+                )
+            )
+            self.assertTrue(
+                check_exposure(
+                    self.policy, self._request(self.superuser), employee
+                )
+            )
+            self.assertFalse(check_exposure(self.policy, None, employee))
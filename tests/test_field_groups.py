@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import ModelViewSet
+
+from drf_confidential.mixins import ConfidentialFieldsMixin
+from drf_confidential.permissions import ConfidentialFieldsPermission
+from drf_confidential.policy import get_policy
+from tests.factories import create_employee
+from tests.testapp.models import Employee
+
+_USER_MODEL = get_user_model()
+
+
+class TieredEmployeeSerializer(
+    ConfidentialFieldsMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = Employee
+        fields = "__all__"
+        confidential_field_groups = {
+            "view_sensitive_employee": ("address_1", "address_2", "city"),
+            "testapp.view_sensitive_profile": ("phone_number", "city"),
+        }
+        user_relation = "login_account"
+
+
+class PhoneEmployeeSerializer(
+    ConfidentialFieldsMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = Employee
+        fields = "__all__"
+        confidential_field_groups = {
+            "view_employee_phone": ("phone_number",),
+        }
+
+
+class PhoneEmployeeViewSet(ModelViewSet):
+    serializer_class = PhoneEmployeeSerializer
+    queryset = Employee.objects.all()
+
+
+class ConfidentialFieldGroupsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employees = [create_employee() for _ in range(3)]
+        cls.linked = _USER_MODEL.objects.create_user(
+            username="linked",
+            password="Test!@#$5",
+            employee_profile=cls.employees[0],
+        )
+        cls.addresses = _USER_MODEL.objects.create_user(
+            username="addresses", password="Test!@#$5"
+        )
+        cls.addresses.user_permissions.add(
+            Permission.objects.get(codename="view_sensitive_employee")
+        )
+        cls.everything = _USER_MODEL.objects.create_user(
+            username="everything", password="Test!@#$5"
+        )
+        cls.everything.user_permissions.add(
+            Permission.objects.get(codename="view_sensitive_employee"),
+            Permission.objects.get(codename="view_sensitive_profile"),
+        )
+
+    def _serialize(self, user):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=user.pk)
+        return TieredEmployeeSerializer(
+            Employee.objects.order_by("pk"),
+            many=True,
+            context={"request": request},
+        ).data
+
+    def test_superusers_hold_permissions_without_rows(self):
+        # No `Permission` row exists for `view_employee_phone`.
+        superuser = _USER_MODEL.objects.create_superuser(
+            username="admin", email="admin@domain.com", password="Test!@#$5"
+        )
+        request = APIRequestFactory().post("/")
+        for user, granted in ((superuser, True), (self.everything, False)):
+            request.user = _USER_MODEL.objects.get(pk=user.pk)
+            view = PhoneEmployeeViewSet(action="create", request=request)
+            self.assertEqual(
+                ConfidentialFieldsPermission().has_permission(request, view),
+                granted,
+            )
+
+    def test_groups_are_compiled(self):
+        policy = get_policy(TieredEmployeeSerializer)
+        self.assertEqual(
+            policy.permissions,
+            frozenset(
+                (
+                    "testapp.view_sensitive_employee",
+                    "testapp.view_sensitive_profile",
+                )
+            ),
+        )
+        self.assertEqual(
+            policy.fields,
+            frozenset(("address_1", "address_2", "city", "phone_number")),
+        )
+
+    def test_each_group_is_gated_by_its_permission(self):
+        for item in self._serialize(self.addresses):
+            self.assertIn("address_1", item)
+            self.assertIn("city", item)
+            self.assertNotIn("phone_number", item)
+
+    def test_holding_every_permission_exposes_everything(self):
+        for item in self._serialize(self.everything):
+            self.assertIn("phone_number", item)
+
+    def test_linked_rows_expose_every_group(self):
+        data = self._serialize(self.linked)
+        self.assertIn("phone_number", data[0])
+        self.assertNotIn("address_1", data[1])
+        self.assertIn("first_name", data[1])
+
+    def test_permissions_are_fetched_once(self):
+        # the user, the rows, the exposure batch, and the user and
+        # group permissions
+        with self.assertNumQueries(5):
+            self._serialize(self.addresses)
+        for _ in range(3):
+            create_employee()
+        with self.assertNumQueries(5):
+            self._serialize(self.addresses)
@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from tests.testapp.models import Post
+
+_USER_MODEL = get_user_model()
+
+
+class ConfidentialFilterBackendTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.user2 = _USER_MODEL.objects.create_user(
+            username="testuser2", password="Test!@#$5"
+        )
+        cls.post1 = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.user1,
+        )
+        cls.post2 = Post.objects.create(
+            post_title="d",
+            post_content="e",
+            secret_note="f",
+            created_by=cls.user2,
+        )
+        cls.user2.user_permissions.add(
+            Permission.objects.get(codename="view_sensitive_post")
+        )
+
+    def _get_ids(self, confidential=None):
+        params = {} if confidential is None else {"confidential": confidential}
+        response = self.client.get(reverse("post-list"), params)
+        return [result["id"] for result in response.data]
+
+    def test_filter_by_relation(self):
+        self.client.force_authenticate(user=self.user1)
+        self.assertEqual(self._get_ids("exposed"), [self.post1.pk])
+        self.assertEqual(self._get_ids("hidden"), [self.post2.pk])
+
+    def test_filter_with_permission(self):
+        self.client.force_authenticate(user=self.user2)
+        self.assertEqual(len(self._get_ids("exposed")), 2)
+        self.assertEqual(self._get_ids("hidden"), [])
+
+    def test_filter_for_anonymous(self):
+        self.assertEqual(self._get_ids("exposed"), [])
+        self.assertEqual(len(self._get_ids("hidden")), 2)
+
+    def test_unknown_value_is_ignored(self):
+        self.client.force_authenticate(user=self.user1)
+        self.assertEqual(len(self._get_ids("bogus")), 2)
+        self.assertEqual(len(self._get_ids()), 2)
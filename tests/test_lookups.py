@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from drf_confidential.lookups import (
+    compile_lookup,
+    compile_user_lookup,
+    get_ownership_path,
+)
+from tests.factories import create_employee
+from tests.testapp.models import Employee, EmployeeJob, Post
+
+_USER_MODEL = get_user_model()
+
+
+class RelationPathTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.employee = create_employee()
+        cls.user.employee_profile = cls.employee
+        cls.user.save()
+        cls.job = EmployeeJob.objects.create(
+            employee=cls.employee, job_title="dev", salary=10000
+        )
+        cls.orphan_job = EmployeeJob.objects.create(
+            employee=create_employee(), job_title="ops", salary=20000
+        )
+        cls.post = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.user,
+        )
+
+    def test_invalid_lookup_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            compile_lookup(EmployeeJob, "employee__first_name")
+        with self.assertRaises(ImproperlyConfigured):
+            compile_lookup(EmployeeJob, "manager")
+
+    def test_ownership_path_requires_relation(self):
+        self.assertIsNone(get_ownership_path(Employee, "created_by"))
+        path = get_ownership_path(Post, "created_by")
+        self.assertEqual(path.query_path, "created_by")
+
+    def test_ownership_path_must_lead_to_the_user_model(self):
+        # Comparing an employee's pk with the user's would leak.
+        self.assertIsNone(get_ownership_path(EmployeeJob, "employee"))
+        with self.assertRaises(ImproperlyConfigured):
+            compile_user_lookup(EmployeeJob, "employee")
+        path = compile_user_lookup(EmployeeJob, "employee__login_account")
+        self.assertTrue(path.ends_at_user)
+
+    def test_forward_foreign_key_compares_ids(self):
+        post = Post.objects.get(pk=self.post.pk)
+        path = get_ownership_path(Post, "created_by")
+        with self.assertNumQueries(0):
+            self.assertTrue(path.is_linked(post, self.user))
+
+    def test_reverse_one_to_one_is_resolved_once(self):
+        path = compile_lookup(EmployeeJob, "employee__login_account")
+
+        job = EmployeeJob.objects.select_related(
+            "employee__login_account"
+        ).get(pk=self.job.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(path.is_linked(job, self.user))
+
+        job = EmployeeJob.objects.select_related("employee").get(
+            pk=self.orphan_job.pk
+        )
+        with self.assertNumQueries(1):
+            self.assertFalse(path.is_linked(job, self.user))
+            self.assertFalse(path.is_linked(job, self.user))
+
+    def test_multi_valued_hop_is_finished_in_one_query(self):
+        path = compile_lookup(Employee, "login_account__posts")
+        employee = Employee.objects.select_related("login_account").get(
+            pk=self.employee.pk
+        )
+        with self.assertNumQueries(1):
+            self.assertEqual(path.resolve(employee), {self.post.pk})
+
+        employee = Employee.objects.prefetch_related(
+            "login_account__posts"
+        ).get(pk=self.employee.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(path.resolve(employee), {self.post.pk})
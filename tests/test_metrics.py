@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from drf_confidential import reasons
+from drf_confidential.decisions import check_exposure
+from drf_confidential.metrics import (
+    disconnect_metrics,
+    metrics,
+    metrics_view,
+)
+from drf_confidential.policy import get_policy
+from drf_confidential.signals import exposure_checked, permission_checked
+from tests.factories import create_employee
+from tests.settings import MIDDLEWARE
+from tests.testapp.models import Employee
+from tests.testapp.serializers import EmployeeSerializer
+
+_USER_MODEL = get_user_model()
+
+
+class ExposureCheckedSignalTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee()
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1",
+            password="Test!@#$5",
+            employee_profile=cls.employee,
+        )
+        cls.other = _USER_MODEL.objects.create_user(
+            username="testuser2", password="Test!@#$5"
+        )
+
+    def setUp(self):
+        self.received = []
+        exposure_checked.connect(self._receiver)
+        self.addCleanup(exposure_checked.disconnect, self._receiver)
+
+    def _receiver(self, sender, **kwargs):
+        self.received.append((sender, kwargs))
+
+    def _check(self, request):
+        employee = Employee.objects.get(pk=self.employee.pk)
+        return check_exposure(
+            get_policy(EmployeeSerializer), request, employee
+        )
+
+    def _request(self, user):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=user.pk)
+        request.user.get_all_permissions()  # warm the permission cache
+        return request
+
+    def test_reports_how_decisions_are_reached(self):
+        request = self._request(self.user)
+        self.assertTrue(self._check(request))
+        self.assertTrue(self._check(request))
+        self.assertFalse(self._check(self._request(self.other)))
+
+        self.assertEqual(
+            [kwargs["reason"] for _, kwargs in self.received],
+            [reasons.RELATION, reasons.MEMO, reasons.DENIED],
+        )
+        sender, kwargs = self.received[0]
+        self.assertIs(sender, EmployeeSerializer)
+        self.assertIs(kwargs["request"], request)
+        self.assertEqual(kwargs["queries"], 1)
+        self.assertGreaterEqual(kwargs["duration"], 0)
+        self.assertEqual(self.received[1][1]["queries"], 0)
+
+    def test_reports_fast_decisions(self):
+        self.assertFalse(self._check(None))
+        self.assertEqual(self.received[0][1]["reason"], reasons.ANONYMOUS)
+        self.assertEqual(self.received[0][1]["queries"], 0)
+
+
+@override_settings(
+    MIDDLEWARE=MIDDLEWARE
+    + ["drf_confidential.metrics.ConfidentialMetricsMiddleware"]
+)
+class MetricsMiddlewareTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee()
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1",
+            password="Test!@#$5",
+            employee_profile=cls.employee,
+        )
+
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(disconnect_metrics)
+        self.addCleanup(metrics.reset)
+
+    def _render(self):
+        response = metrics_view(RequestFactory().get("/metrics"))
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4")
+        return response.content.decode()
+
+    def test_collects_checks_per_request(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get(reverse("employee-list"))
+        self.client.delete(reverse("employee-detail", args=[self.employee.pk]))
+
+        text = self._render()
+        self.assertIn(
+            'drf_confidential_exposure_checks_total{reason="annotation",'
+            'exposed="true"} 1',
+            text,
+        )
+        self.assertIn(
+            'drf_confidential_exposure_checks_total{reason="relation",'
+            'exposed="true"} 1',
+            text,
+        )
+        self.assertIn(
+            "drf_confidential_permission_checks_total"
+            '{method="has_object_permission",granted="true"} 1',
+            text,
+        )
+        self.assertIn(
+            'drf_confidential_request_exposure_checks_bucket{le="0"} 0', text
+        )
+        self.assertIn(
+            'drf_confidential_request_exposure_checks_bucket{le="1"} 2', text
+        )
+        self.assertIn("drf_confidential_request_exposure_checks_count 2", text)
+        self.assertIn(
+            "# TYPE drf_confidential_exposure_check_seconds_total counter",
+            text,
+        )
+
+    def test_signals_are_quiet_without_metrics(self):
+        disconnect_metrics()
+        self.assertFalse(exposure_checked.receivers)
+        self.assertFalse(permission_checked.receivers)
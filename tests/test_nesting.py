@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential import reasons
+from drf_confidential.mixins import ConfidentialFieldsMixin
+from drf_confidential.nesting import get_nested_exposures
+from drf_confidential.signals import exposure_checked
+from tests.factories import create_employee
+from tests.testapp.models import Employee, EmployeeJob, Profile
+from tests.testapp.serializers import (
+    EmployeeJobSerializer,
+    EmployeeSerializer,
+    ProfileSerializer,
+)
+
+_USER_MODEL = get_user_model()
+
+
+class InheritingProfileSerializer(ProfileSerializer):
+    class Meta(ProfileSerializer.Meta):
+        confidential_nested = {"employee_profile": "inherit"}
+
+
+class DerivingProfileSerializer(ProfileSerializer):
+    class Meta(ProfileSerializer.Meta):
+        confidential_nested = {"employee_profile": "relation"}
+
+
+class EmployeeWithJobSerializer(EmployeeSerializer):
+    job = EmployeeJobSerializer()
+
+    class Meta(EmployeeSerializer.Meta):
+        confidential_nested = {"job": "relation"}
+
+
+class MisnestedSerializer(
+    ConfidentialFieldsMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = Employee
+        fields = "__all__"
+        confidential_fields = ("city",)
+        confidential_nested = {"first_name": "inherit"}
+
+
+class NestedExposureTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(4):
+            employee = create_employee()
+            EmployeeJob.objects.create(
+                employee=employee, job_title="dev", salary=10000
+            )
+            _USER_MODEL.objects.create_user(
+                username="testuser{}".format(index),
+                password="Test!@#$5",
+                employee_profile=employee,
+            )
+        cls.user = _USER_MODEL.objects.get(username="testuser0")
+
+    def _serialize(self, serializer_class, queryset):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=self.user.pk)
+        checks = []
+
+        def receiver(instance, reason, queries, **kwargs):
+            checks.append((type(instance), reason, queries))
+
+        exposure_checked.connect(receiver)
+        self.addCleanup(exposure_checked.disconnect, receiver)
+        with CaptureQueriesContext(connection) as context:
+            data = serializer_class(
+                queryset, many=True, context={"request": request}
+            ).data
+        exposure_checked.disconnect(receiver)
+        return data, checks, len(context.captured_queries)
+
+    def _profiles(self):
+        return Profile.objects.select_related("employee_profile").order_by(
+            "pk"
+        )
+
+    def test_inherited_decisions(self):
+        expected, _, queries = self._serialize(
+            ProfileSerializer, self._profiles()
+        )
+        data, checks, inherited_queries = self._serialize(
+            InheritingProfileSerializer, self._profiles()
+        )
+        self.assertEqual(data, expected)
+        self.assertLess(inherited_queries, queries)
+        self.assertEqual(
+            {reason for model, reason, _ in checks if model is Employee},
+            {reasons.INHERITED},
+        )
+
+    def test_decisions_derived_from_the_relation(self):
+        expected, _, _ = self._serialize(ProfileSerializer, self._profiles())
+        data, checks, _ = self._serialize(
+            DerivingProfileSerializer, self._profiles()
+        )
+        self.assertEqual(data, expected)
+        self.assertIn((Employee, reasons.RELATION, 0), checks)
+
+    def test_path_rest_is_followed_from_the_parent(self):
+        (nested,) = get_nested_exposures(EmployeeWithJobSerializer)
+        self.assertEqual(nested.path.lookup, "login_account")
+
+        employees = Employee.objects.select_related(
+            "job", "login_account"
+        ).order_by("pk")
+        data, checks, _ = self._serialize(EmployeeWithJobSerializer, employees)
+        salaries = [
+            item["job"]["salary"] for item in data if "salary" in item["job"]
+        ]
+        self.assertEqual(salaries, [10000])
+        self.assertIn((EmployeeJob, reasons.RELATION, 0), checks)
+
+    def test_misdeclarations_are_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_nested_exposures(MisnestedSerializer)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import ModelViewSet
+
+from drf_confidential.permissions import ConfidentialFieldsPermission
+from tests.testapp.models import Post
+from tests.testapp.serializers import PostSerializer
+
+_USER_MODEL = get_user_model()
+
+
+class SerializerlessPostViewSet(ModelViewSet):
+    serializer_class = PostSerializer
+    queryset = Post.objects.all()
+
+    def get_serializer(self, *args, **kwargs):
+        raise AssertionError("the serializer must not be instantiated")
+
+
+class ConfidentialFieldsPermissionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.post = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.user,
+        )
+
+    def _check(self, action):
+        request = APIRequestFactory().patch("/")
+        request.user = self.user
+        view = SerializerlessPostViewSet(action=action, request=request)
+        permission = ConfidentialFieldsPermission()
+        return permission.has_permission(
+            request, view
+        ) and permission.has_object_permission(request, view, self.post)
+
+    def test_serializer_is_not_instantiated(self):
+        self.assertTrue(self._check("partial_update"))
+        self.assertTrue(self._check("destroy"))
+        self.assertFalse(self._check("create"))
@@ -0,0 +1,86 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from rest_framework import serializers
+
+from drf_confidential.mixins import ConfidentialFieldsMixin
+from drf_confidential.policy import get_policy
+from tests.testapp.models import EmployeeJob, Post
+from tests.testapp.serializers import (
+    EmployeeJobSerializer,
+    PostSerializer,
+    ProfileSerializer,
+)
+
+
+class ConfidentialPolicyTest(SimpleTestCase):
+    def test_policy_is_compiled_once(self):
+        self.assertIs(
+            get_policy(EmployeeJobSerializer),
+            get_policy(EmployeeJobSerializer),
+        )
+
+    def test_policy_is_precomputed(self):
+        policy = get_policy(EmployeeJobSerializer)
+        self.assertIs(policy.model, EmployeeJob)
+        self.assertEqual(
+            policy.groups,
+            (("testapp.view_employee_salary", frozenset(("salary",))),),
+        )
+        self.assertEqual(policy.fields, frozenset(("salary",)))
+        self.assertEqual(
+            [path.query_path for path in policy.relations],
+            ["employee__login_account"],
+        )
+        self.assertIsNone(policy.ownership)
+        self.assertFalse(policy.is_user_model)
+
+    def test_default_permission_and_ownership(self):
+        policy = get_policy(PostSerializer)
+        self.assertEqual(
+            policy.permissions, frozenset(("testapp.view_sensitive_post",))
+        )
+        self.assertEqual(policy.ownership.query_path, "created_by")
+        self.assertEqual(policy.relations, ())
+        self.assertTrue(get_policy(ProfileSerializer).is_user_model)
+
+    def test_policy_is_immutable(self):
+        policy = get_policy(PostSerializer)
+        with self.assertRaises(AttributeError):
+            policy.permission = "testapp.add_post"
+        with self.assertRaises(AttributeError):
+            policy.extra = True
+
+    def test_invalid_user_relation_fails_on_definition(self):
+        with self.assertRaises(ImproperlyConfigured):
+
+            class InvalidSerializer(
+                ConfidentialFieldsMixin, serializers.ModelSerializer
+            ):
+                class Meta:
+                    model = Post
+                    fields = "__all__"
+                    confidential_fields = ("secret_note",)
+                    user_relation = "author"
+
+    def test_user_relation_must_lead_to_the_user_model(self):
+        with self.assertRaises(ImproperlyConfigured):
+
+            class InvalidSerializer(
+                ConfidentialFieldsMixin, serializers.ModelSerializer
+            ):
+                class Meta:
+                    model = EmployeeJob
+                    fields = "__all__"
+                    confidential_fields = ("salary",)
+                    user_relation = "employee"
+
+    def test_missing_confidential_fields_fails_on_definition(self):
+        with self.assertRaises(ImproperlyConfigured):
+
+            class InvalidSerializer(
+                ConfidentialFieldsMixin, serializers.ModelSerializer
+            ):
+                class Meta:
+                    model = Post
+                    fields = "__all__"
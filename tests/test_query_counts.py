@@ -0,0 +1,162 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from tests.factories import create_employee
+from tests.testapp.models import Employee, EmployeeJob, Post, Profile
+from tests.testapp.serializers import PostSerializer, ProfileSerializer
+
+_USER_MODEL = get_user_model()
+_ENDPOINTS = ("employee", "profile", "employeejob", "post")
+_PAGE_SIZES = (1, 4, 10)
+
+
+class ProfileWithPostsSerializer(ProfileSerializer):
+    posts = PostSerializer(many=True)
+
+
+class ProfileInheritingPostsSerializer(ProfileWithPostsSerializer):
+    class Meta(ProfileWithPostsSerializer.Meta):
+        confidential_nested = {"posts": "inherit"}
+
+
+def _create_records(username):
+    """Create a login account with an employee profile, job and post."""
+    employee = create_employee()
+    user = _USER_MODEL.objects.create_user(
+        username=username, password="Test!@#$5", employee_profile=employee
+    )
+    EmployeeJob.objects.create(
+        employee=employee, job_title="dev", salary=10000
+    )
+    Post.objects.create(
+        post_title="a", post_content="b", secret_note="c", created_by=user
+    )
+    return user
+
+
+class ListQueryCountTest(APITestCase):
+    """The queries of list endpoints must not grow with the page size.
+
+    Every endpoint is requested by every kind of user at several page
+    sizes. A failure reports the queries of the largest page, so that
+    an N+1 introduced in the exposure checks is easy to spot.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.linked = _create_records("linked")
+        cls.unprivileged = _USER_MODEL.objects.create_user(
+            username="unprivileged", password="Test!@#$5"
+        )
+        cls.privileged = _USER_MODEL.objects.create_user(
+            username="privileged", password="Test!@#$5"
+        )
+        cls.privileged.user_permissions.add(
+            *Permission.objects.filter(codename__startswith="view_sensitive")
+        )
+        cls.superuser = _USER_MODEL.objects.create_superuser(
+            username="admin", email="admin@domain.com", password="Test!@#$5"
+        )
+
+    def setUp(self):
+        # Content types are cached per process once looked up, so look
+        # them up beforehand for every run to count alike.
+        ContentType.objects.get_for_models(
+            Employee, EmployeeJob, Post, Profile
+        )
+
+    def _capture(self, endpoint, user):
+        # A fresh user object, so that its permissions are loaded by
+        # every request alike.
+        if user is not None:
+            user = _USER_MODEL.objects.get(pk=user.pk)
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(endpoint + "-list"))
+        self.assertEqual(response.status_code, 200)
+        return len(response.data), [q["sql"] for q in context.captured_queries]
+
+    def test_queries_do_not_grow_with_page_size(self):
+        users = {
+            "anonymous": None,
+            "unprivileged": self.unprivileged,
+            "linked": self.linked,
+            "privileged": self.privileged,
+            "superuser": self.superuser,
+        }
+        captured = {}
+        for page_size in _PAGE_SIZES:
+            while Employee.objects.count() < page_size:
+                _create_records(get_random_string(length=12))
+            for endpoint in _ENDPOINTS:
+                for name, user in users.items():
+                    captured.setdefault((endpoint, name), []).append(
+                        self._capture(endpoint, user)
+                    )
+
+        for (endpoint, name), runs in captured.items():
+            with self.subTest(endpoint=endpoint, user=name):
+                (_, smallest), (size, largest) = runs[0], runs[-1]
+                self.assertEqual(
+                    len(largest),
+                    len(smallest),
+                    "{} queries for {} rows, {} for {} rows:\n{}".format(
+                        len(largest),
+                        size,
+                        len(smallest),
+                        runs[0][0],
+                        "\n".join(largest),
+                    ),
+                )
+
+    def _count_nested(self, serializer_class, user, size):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=user.pk)
+        profiles = (
+            Profile.objects.filter(employee_profile__isnull=False)
+            .select_related("employee_profile")
+            .prefetch_related("groups", "user_permissions", "posts")
+            .order_by("pk")[:size]
+        )
+        with CaptureQueriesContext(connection) as context:
+            data = serializer_class(
+                profiles, many=True, context={"request": request}
+            ).data
+        self.assertEqual(len(data), size)
+        return len(context.captured_queries)
+
+    def _assert_nested_flat(self, **subtest):
+        serializer_classes = (
+            ProfileWithPostsSerializer,
+            ProfileInheritingPostsSerializer,
+        )
+        for serializer_class in serializer_classes:
+            for user in (self.linked, self.unprivileged):
+                with self.subTest(
+                    serializer=serializer_class.__name__,
+                    user=user.username,
+                    **subtest,
+                ):
+                    self.assertEqual(
+                        self._count_nested(serializer_class, user, 10),
+                        self._count_nested(serializer_class, user, 2),
+                    )
+
+    def test_nested_lists_are_decided_once(self):
+        while Employee.objects.count() < 10:
+            _create_records(get_random_string(length=12))
+        self._assert_nested_flat(backend=True)
+        with mock.patch(
+            "drf_confidential.policy.get_object_permission_backend",
+            return_value=None,
+        ):
+            self._assert_nested_flat(backend=False)
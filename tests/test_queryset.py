@@ -0,0 +1,295 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Permission
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from drf_confidential.mixins import ConfidentialFieldsMixin
+from drf_confidential.policy import get_policy
+from drf_confidential.queryset import annotate_exposure, exposure_annotation
+from drf_confidential.related import get_related_lookups
+from tests.factories import create_employee
+from tests.testapp.models import Employee, EmployeeJob, Post
+from tests.testapp.serializers import (
+    EmployeeJobSerializer,
+    EmployeeSerializer,
+    PostSerializer,
+    ProfileSerializer,
+)
+
+_USER_MODEL = get_user_model()
+
+
+class AnnotateExposureTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user1 = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.user2 = _USER_MODEL.objects.create_user(
+            username="testuser2", password="Test!@#$5"
+        )
+        cls.employee1 = create_employee()
+        cls.employee2 = create_employee()
+        cls.user1.employee_profile = cls.employee1
+        cls.user1.save()
+        cls.job1 = EmployeeJob.objects.create(
+            employee=cls.employee1, job_title="dev", salary=10000
+        )
+        cls.job2 = EmployeeJob.objects.create(
+            employee=cls.employee2, job_title="ops", salary=20000
+        )
+        cls.post1 = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.user1,
+        )
+        cls.post2 = Post.objects.create(
+            post_title="d",
+            post_content="e",
+            secret_note="f",
+            created_by=cls.user2,
+        )
+        cls.user2.user_permissions.add(
+            Permission.objects.get(codename="view_employee_salary")
+        )
+
+    def _flags(self, queryset, serializer_class, user):
+        queryset = annotate_exposure(queryset, serializer_class, user)
+        return {obj.pk: getattr(obj, exposure_annotation) for obj in queryset}
+
+    def test_user_relation_is_annotated(self):
+        flags = self._flags(
+            EmployeeJob.objects.all(), EmployeeJobSerializer, self.user1
+        )
+        self.assertEqual(flags, {self.job1.pk: True, self.job2.pk: False})
+
+    def test_ownership_is_annotated(self):
+        flags = self._flags(Post.objects.all(), PostSerializer, self.user1)
+        self.assertEqual(flags, {self.post1.pk: True, self.post2.pk: False})
+
+    def test_permission_exposes_every_row(self):
+        flags = self._flags(
+            EmployeeJob.objects.all(), EmployeeJobSerializer, self.user2
+        )
+        self.assertTrue(all(flags.values()))
+
+    def test_anonymous_user_sees_nothing(self):
+        flags = self._flags(
+            Employee.objects.all(), EmployeeSerializer, AnonymousUser()
+        )
+        self.assertFalse(any(flags.values()))
+
+
+class AnnotatedListQueryTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.user.employee_profile = create_employee()
+        cls.user.save()
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("employee-list"))
+        self.assertEqual(
+            sum("address_1" in result for result in response.data), 1
+        )
+        return len(context.captured_queries)
+
+    def test_list_queries_do_not_grow_with_rows(self):
+        self.client.force_authenticate(user=self.user)
+        self._count_list_queries()  # warm the user's permission cache
+
+        baseline = self._count_list_queries()
+        for _ in range(5):
+            create_employee()
+        self.assertEqual(self._count_list_queries(), baseline)
+
+
+class PostAuthorSerializer(
+    ConfidentialFieldsMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = Employee
+        fields = "__all__"
+        confidential_fields = ("phone_number",)
+        user_relation = "login_account__posts__created_by"
+
+
+class ColleagueSerializer(
+    ConfidentialFieldsMixin, serializers.ModelSerializer
+):
+    class Meta:
+        model = Employee
+        fields = "__all__"
+        confidential_fields = ("phone_number",)
+        user_relation = (
+            "job__employee__login_account",
+            "login_account__posts__created_by",
+        )
+
+
+class MultipleUserRelationsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # linked through the job only, through posts only, and not at all
+        cls.employees = [create_employee() for _ in range(3)]
+        EmployeeJob.objects.create(
+            employee=cls.employees[0], job_title="dev", salary=10000
+        )
+        cls.users = [
+            _USER_MODEL.objects.create_user(
+                username="testuser{}".format(index),
+                password="Test!@#$5",
+                employee_profile=employee,
+            )
+            for index, employee in enumerate(cls.employees)
+        ]
+        Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.users[1],
+        )
+
+    def test_paths_are_ored_in_a_single_query(self):
+        for user, employee in zip(self.users, self.employees):
+            queryset = annotate_exposure(
+                Employee.objects.all(), ColleagueSerializer, user
+            )
+            with self.assertNumQueries(1):
+                exposed = [
+                    obj.pk
+                    for obj in queryset
+                    if getattr(obj, exposure_annotation)
+                ]
+            expected = [] if user is self.users[2] else [employee.pk]
+            self.assertEqual(exposed, expected)
+
+    def test_instance_checks_follow_every_path(self):
+        policy = get_policy(ColleagueSerializer)
+        for index, user in enumerate(self.users):
+            exposed = [
+                policy.is_exposed(employee, user)
+                for employee in Employee.objects.order_by("pk")
+            ]
+            self.assertEqual(exposed, [index == 0, index == 1, False])
+
+
+class RelatedLookupsTest(TestCase):
+    def test_single_valued_relations_are_joined(self):
+        self.assertEqual(
+            get_related_lookups(EmployeeJobSerializer),
+            (("employee__login_account",), ()),
+        )
+        self.assertEqual(
+            get_related_lookups(EmployeeJobSerializer, include_own=False),
+            ((), ()),
+        )
+
+    def test_ownership_compared_by_id_is_not_joined(self):
+        self.assertEqual(get_related_lookups(PostSerializer), ((), ()))
+
+    def test_nested_confidential_serializers_are_joined(self):
+        self.assertEqual(
+            get_related_lookups(ProfileSerializer, include_own=False),
+            (("employee_profile__login_account",), ()),
+        )
+
+    def test_every_user_relation_is_planned(self):
+        self.assertEqual(
+            get_related_lookups(ColleagueSerializer),
+            (
+                ("job__employee__login_account", "login_account"),
+                ("login_account__posts",),
+            ),
+        )
+
+    def test_multi_valued_relations_are_prefetched(self):
+        self.assertEqual(
+            get_related_lookups(PostAuthorSerializer),
+            (("login_account",), ("login_account__posts",)),
+        )
+
+
+class NestedListQueryTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.user.employee_profile = create_employee()
+        cls.user.save()
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("profile-list"))
+        self.assertEqual(
+            sum(
+                "address_1" in result["employee_profile"]
+                for result in response.data
+            ),
+            1,
+        )
+        return len(context.captured_queries)
+
+    def test_nested_list_queries_do_not_grow_with_rows(self):
+        self.client.force_authenticate(user=self.user)
+        self._count_list_queries()  # warm the user's permission cache
+
+        baseline = self._count_list_queries()
+        for index in range(5):
+            _USER_MODEL.objects.create_user(
+                username="user{}".format(index),
+                password="Test!@#$5",
+                employee_profile=create_employee(),
+            )
+        self.assertEqual(self._count_list_queries(), baseline)
+
+
+class DeferConfidentialTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.post = Post.objects.create(
+            post_title="a",
+            post_content="b",
+            secret_note="c",
+            created_by=cls.user,
+        )
+
+    def _get_list_sql(self, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("post-list"), params)
+        self.assertEqual(len(response.data), 1)
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if 'FROM "testapp_post"' in query["sql"]
+        ]
+
+    def test_columns_are_deferred_when_nothing_is_exposed(self):
+        sql = self._get_list_sql()
+        self.assertNotIn('"testapp_post"."secret_note"', sql[0])
+
+    def test_columns_are_deferred_for_hidden_rows(self):
+        other = _USER_MODEL.objects.create_user(
+            username="testuser2", password="Test!@#$5"
+        )
+        self.client.force_authenticate(user=other)
+        sql = self._get_list_sql({"confidential": "hidden"})
+        self.assertNotIn('"testapp_post"."secret_note"', sql[0])
+
+    def test_columns_are_fetched_when_exposable(self):
+        self.client.force_authenticate(user=self.user)
+        sql = self._get_list_sql()
+        self.assertIn('"testapp_post"."secret_note"', sql[0])
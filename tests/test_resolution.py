@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from drf_confidential.lookups import compile_lookup
+from drf_confidential.resolution import RelationCache
+from tests.factories import create_employee
+from tests.testapp.models import EmployeeJob
+
+_USER_MODEL = get_user_model()
+
+
+class RelationCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee()
+        cls.other = create_employee()
+        cls.job = EmployeeJob.objects.create(
+            employee=cls.employee, job_title="dev", salary=10000
+        )
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser",
+            password="Test!@#$5",
+            employee_profile=cls.employee,
+        )
+        cls.path = compile_lookup(EmployeeJob, "employee__login_account")
+
+    def _use_cache(self, maxsize=100, timeout=60):
+        cache = RelationCache(maxsize, timeout)
+        patcher = mock.patch(
+            "drf_confidential.resolution.relation_cache", cache
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return cache
+
+    def _is_linked(self):
+        job = EmployeeJob.objects.get(pk=self.job.pk)
+        return self.path.is_linked(job, self.user)
+
+    def test_resolutions_are_reused(self):
+        self._use_cache()
+        self.assertTrue(self._is_linked())
+        job = EmployeeJob.objects.get(pk=self.job.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(self.path.is_linked(job, self.user))
+
+    def test_relinking_invalidates(self):
+        self._use_cache()
+        self.assertTrue(self._is_linked())
+        self.user.employee_profile = self.other
+        self.user.save()
+        self.assertFalse(self._is_linked())
+
+        self.assertFalse(self._is_linked())
+        self.job.employee = self.other
+        self.job.save()
+        self.assertTrue(self._is_linked())
+
+    def test_entries_expire(self):
+        self._use_cache(timeout=0)
+        self.assertTrue(self._is_linked())
+        job = EmployeeJob.objects.get(pk=self.job.pk)
+        with self.assertNumQueries(2):
+            self.path.is_linked(job, self.user)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self._use_cache(maxsize=1)
+        other_job = EmployeeJob.objects.create(
+            employee=self.other, job_title="dev", salary=10000
+        )
+        self.assertTrue(self._is_linked())
+        self.assertFalse(self.path.is_linked(other_job, self.user))
+        self.assertIsNone(cache.get(self.path, self.job.pk))
+        self.assertEqual(cache.get(self.path, other_job.pk), frozenset())
@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential.serializers import ConfidentialListSerializer
+from tests.factories import create_job
+from tests.testapp.models import EmployeeJob
+from tests.testapp.serializers import EmployeeJobSerializer
+
+_USER_MODEL = get_user_model()
+
+
+class SalaryBandSerializer(EmployeeJobSerializer):
+    salary_band = serializers.SerializerMethodField()
+
+    class Meta(EmployeeJobSerializer.Meta):
+        confidential_fields = ("salary", "salary_band")
+
+    def get_salary_band(self, obj):
+        self.context["evaluated"].append(obj.pk)
+        return obj.salary // 10000
+
+
+class BandListSerializer(serializers.ListSerializer):
+    pass
+
+
+class BandedJobSerializer(SalaryBandSerializer):
+    class Meta(SalaryBandSerializer.Meta):
+        list_serializer_class = BandListSerializer
+
+
+class ListSerializerClassTest(TestCase):
+    def test_meta_is_left_as_declared(self):
+        self.assertIsInstance(
+            EmployeeJobSerializer(many=True), ConfidentialListSerializer
+        )
+        self.assertFalse(
+            hasattr(EmployeeJobSerializer.Meta, "list_serializer_class")
+        )
+        self.assertIs(type(BandedJobSerializer(many=True)), BandListSerializer)
+
+
+class ConfidentialListSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.job = create_job(10000)
+        cls.user.employee_profile = cls.job.employee
+        cls.user.save()
+        create_job(20000)
+
+    def _serialize(self):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=self.user.pk)
+        request.user.get_all_permissions()  # warm the permission cache
+        serializer = EmployeeJobSerializer(
+            EmployeeJob.objects.all(), many=True, context={"request": request}
+        )
+        self.assertIsInstance(serializer, ConfidentialListSerializer)
+        with CaptureQueriesContext(connection) as context:
+            data = serializer.data
+        return data, len(context.captured_queries)
+
+    def test_exposure_is_decided_per_item(self):
+        data, _ = self._serialize()
+        exposed = [item["id"] for item in data if "salary" in item]
+        self.assertEqual(exposed, [self.job.pk])
+
+    def test_queries_do_not_grow_with_items(self):
+        _, baseline = self._serialize()
+        for salary in range(5):
+            create_job(salary)
+        _, num_queries = self._serialize()
+        self.assertEqual(num_queries, baseline)
+
+    def test_iter_representation_decides_per_chunk(self):
+        for salary in range(3):
+            create_job(salary)
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=self.user.pk)
+        request.user.get_all_permissions()  # warm the permission cache
+        queryset = EmployeeJob.objects.order_by("pk")
+        serializer = EmployeeJobSerializer(
+            queryset, many=True, context={"request": request}
+        )
+
+        # one query for the rows, one per chunk of two to decide
+        with self.assertNumQueries(4):
+            data = list(serializer.iter_representation(queryset, 2))
+        self.assertEqual(request._confidential_decisions, {})
+        self.assertEqual(data, serializer.data)
+
+
+class ConfidentialFieldsEvaluationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1", password="Test!@#$5"
+        )
+        cls.job = create_job(10000)
+        cls.user.employee_profile = cls.job.employee
+        cls.user.save()
+        cls.other_job = create_job(20000)
+
+    def _serialize(self, job):
+        request = APIRequestFactory().get("/")
+        request.user = self.user
+        context = {"request": request, "evaluated": []}
+        data = SalaryBandSerializer(job, context=context).data
+        return data, context["evaluated"]
+
+    def test_exposed_fields_are_evaluated(self):
+        data, evaluated = self._serialize(self.job)
+        self.assertEqual(data["salary_band"], 1)
+        self.assertEqual(evaluated, [self.job.pk])
+
+    def test_hidden_fields_are_not_evaluated(self):
+        data, evaluated = self._serialize(self.other_job)
+        self.assertNotIn("salary_band", data)
+        self.assertNotIn("salary", data)
+        self.assertEqual(evaluated, [])
@@ -0,0 +1,74 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APITestCase
+
+from tests.factories import create_employee
+
+_USER_MODEL = get_user_model()
+
+
+class StreamingListTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = _USER_MODEL.objects.create_user(
+            username="testuser1",
+            password="Test!@#$5",
+            employee_profile=create_employee(),
+        )
+        for index in range(3):
+            _USER_MODEL.objects.create_user(
+                username="other{}".format(index),
+                password="Test!@#$5",
+                employee_profile=create_employee(),
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def _stream(self, endpoint, stream_format):
+        response = self.client.get(
+            reverse(endpoint + "-list"), {"stream": stream_format}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_json_array_matches_list(self):
+        expected = self.client.get(reverse("profile-list")).data
+        response, content = self._stream("profile", "json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(content), json.loads(json.dumps(expected)))
+
+    def test_json_lines_match_list(self):
+        expected = self.client.get(reverse("employee-list")).data
+        response, content = self._stream("employee", "jsonl")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        items = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(items, json.loads(json.dumps(expected)))
+        exposed = [item["id"] for item in items if "address_1" in item]
+        self.assertEqual(exposed, [self.user.employee_profile_id])
+
+    def test_queries_do_not_grow_with_rows(self):
+        def count():
+            with CaptureQueriesContext(connection) as context:
+                self._stream("profile", "jsonl")
+            return len(context.captured_queries)
+
+        baseline = count()
+        for index in range(5):
+            _USER_MODEL.objects.create_user(
+                username="more{}".format(index),
+                password="Test!@#$5",
+                employee_profile=create_employee(),
+            )
+        self.assertEqual(count(), baseline)
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse("employee-list"), {"stream": "xml"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stream", response.data)
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from drf_confidential.mixins import ConfidentialFieldsMixin
+from tests.factories import create_employee
+from tests.testapp.models import EmployeeJob, Post
+from tests.testapp.serializers import (
+    EmployeeJobSerializer,
+    EmployeeSerializer,
+    PostSerializer,
+    ProfileSerializer,
+)
+
+_USER_MODEL = get_user_model()
+
+
+class JobTitleSerializer(ConfidentialFieldsMixin, serializers.ModelSerializer):
+    first_name = serializers.CharField(source="employee.first_name")
+
+    class Meta:
+        model = EmployeeJob
+        fields = ("id", "job_title", "first_name", "salary")
+        confidential_fields = ("salary",)
+        confidential_permission = "view_employee_salary"
+        user_relation = "employee__login_account"
+
+
+class ValuesSerializationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            employee = create_employee()
+            user = _USER_MODEL.objects.create_user(
+                username="testuser{}".format(index),
+                password="Test!@#$5",
+                employee_profile=employee,
+            )
+            EmployeeJob.objects.create(
+                employee=employee, job_title="dev", salary=10000
+            )
+            Post.objects.create(
+                post_title="a",
+                post_content="b",
+                secret_note="c",
+                created_by=user,
+            )
+        cls.user = _USER_MODEL.objects.get(username="testuser0")
+        cls.privileged = _USER_MODEL.objects.create_user(
+            username="privileged", password="Test!@#$5"
+        )
+        cls.privileged.user_permissions.add(
+            *Permission.objects.filter(codename__startswith="view_sensitive")
+        )
+
+    def _serializer(self, serializer_class, user):
+        request = APIRequestFactory().get("/")
+        request.user = _USER_MODEL.objects.get(pk=user.pk)
+        queryset = serializer_class.Meta.model.objects.order_by("pk")
+        return (
+            serializer_class(
+                queryset, many=True, context={"request": request}
+            ),
+            queryset,
+        )
+
+    def test_matches_instance_serialization(self):
+        for serializer_class in (
+            EmployeeSerializer,
+            EmployeeJobSerializer,
+            PostSerializer,
+            JobTitleSerializer,
+        ):
+            for user in (self.user, self.privileged):
+                with self.subTest(
+                    serializer=serializer_class.__name__, user=user.username
+                ):
+                    serializer, queryset = self._serializer(
+                        serializer_class, user
+                    )
+                    expected = serializer.data
+                    serializer, queryset = self._serializer(
+                        serializer_class, user
+                    )
+                    self.assertEqual(
+                        list(serializer.iter_values(queryset)), expected
+                    )
+
+    def test_single_query(self):
+        serializer, queryset = self._serializer(PostSerializer, self.user)
+        with self.assertNumQueries(3):  # two for the user's permissions
+            items = list(serializer.iter_values(queryset))
+        self.assertEqual(
+            [item["id"] for item in items if "secret_note" in item],
+            list(
+                Post.objects.filter(created_by=self.user).values_list(
+                    "pk", flat=True
+                )
+            ),
+        )
+
+    def test_nested_serializers_are_rejected(self):
+        serializer, queryset = self._serializer(ProfileSerializer, self.user)
+        with self.assertRaises(ImproperlyConfigured):
+            list(serializer.iter_values(queryset))
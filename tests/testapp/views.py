@@ -1,6 +1,13 @@
 from rest_framework.viewsets import ModelViewSet
 
+from drf_confidential.filters import ConfidentialFilterBackend
 from drf_confidential.permissions import ConfidentialFieldsPermission
+from drf_confidential.viewsets import (
+    ConfidentialBulkMixin,
+    ConfidentialConditionalMixin,
+    ConfidentialQuerysetMixin,
+    ConfidentialStreamingMixin,
+)
 
 from .serializers import (
     EmployeeSerializer,
@@ -11,25 +18,39 @@ from .serializers import (
 from .models import Employee, Profile, EmployeeJob, Post
 
 
-class EmployeeViewSet(ModelViewSet):
+class EmployeeViewSet(
+    ConfidentialBulkMixin,
+    ConfidentialStreamingMixin,
+    ConfidentialConditionalMixin,
+    ConfidentialQuerysetMixin,
+    ModelViewSet,
+):
     serializer_class = EmployeeSerializer
     queryset = Employee.objects.all()
     permission_classes = (ConfidentialFieldsPermission,)
+    filter_backends = (ConfidentialFilterBackend,)
 
 
-class ProfileViewSet(ModelViewSet):
+class ProfileViewSet(
+    ConfidentialStreamingMixin, ConfidentialQuerysetMixin, ModelViewSet
+):
     serializer_class = ProfileSerializer
-    queryset = Profile.objects.all()
+    queryset = Profile.objects.prefetch_related("groups", "user_permissions")
     permission_classes = (ConfidentialFieldsPermission,)
+    filter_backends = (ConfidentialFilterBackend,)
 
 
-class EmployeeJobViewSet(ModelViewSet):
+class EmployeeJobViewSet(ConfidentialQuerysetMixin, ModelViewSet):
     serializer_class = EmployeeJobSerializer
     queryset = EmployeeJob.objects.all()
     permission_classes = (ConfidentialFieldsPermission,)
+    filter_backends = (ConfidentialFilterBackend,)
 
 
-class PostViewSet(ModelViewSet):
+class PostViewSet(
+    ConfidentialBulkMixin, ConfidentialQuerysetMixin, ModelViewSet
+):
     serializer_class = PostSerializer
     queryset = Post.objects.all()
     permission_classes = (ConfidentialFieldsPermission,)
+    filter_backends = (ConfidentialFilterBackend,)